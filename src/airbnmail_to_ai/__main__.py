@@ -98,11 +98,11 @@ def process_emails(config: Dict[str, Any]) -> None:
         
         logger.info(f"Found {len(emails)} new Airbnb emails to process")
         
+        # Parse the emails, several per LLM request
+        parsed_emails = email_parser.parse_emails(emails)
+
         # Process each email
-        for email in emails:
-            # Parse the email
-            parsed_data = email_parser.parse_email(email)
-            
+        for email, parsed_data in zip(emails, parsed_emails, strict=True):
             if not parsed_data:
                 logger.warning(f"Failed to parse email with subject: {email.get('subject', 'Unknown')}")
                 continue
@@ -1,7 +1,6 @@
 """Gmail API authentication helper."""
 
 import os
-import pickle
 from pathlib import Path
 from typing import Optional
 
@@ -35,8 +34,11 @@ def authenticate(
     # Check if the token file exists and load credentials
     if os.path.exists(token_path):
         logger.info(f"Loading existing token from {token_path}")
-        with open(token_path, "rb") as token:
-            credentials = pickle.load(token)
+        try:
+            credentials = Credentials.from_authorized_user_file(token_path, SCOPES)
+        except ValueError as e:
+            # Tokens written by older versions were pickled; re-authorize
+            logger.warning(f"Ignoring unreadable token file {token_path}: {e}")
 
     # Check if credentials are valid, refresh if expired
     if credentials and credentials.valid:
@@ -71,8 +73,8 @@ def authenticate(
             return None
     
     # Save the credentials for the next run
-    with open(token_path, "wb") as token:
-        pickle.dump(credentials, token)
+    with open(token_path, "w") as token:
+        token.write(credentials.to_json())
         logger.info(f"Credentials saved to {token_path}")
     
     return credentials
@@ -89,7 +91,9 @@ def validate_credentials(credentials: Credentials) -> bool:
     """
     try:
         # Build the Gmail service
-        service = build("gmail", "v1", credentials=credentials)
+        service = build(
+            "gmail", "v1", credentials=credentials, static_discovery=True, cache_discovery=False
+        )
         
         # Make a simple API call
         profile = service.users().getProfile(userId="me").execute()
@@ -1,11 +1,11 @@
 """Authentication module for Google Calendar API."""
 
 import os
-import pickle
 from pathlib import Path
 from typing import Optional
 
 from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from loguru import logger
@@ -31,8 +31,11 @@ def get_calendar_service(
 
         # The file token.json stores the user's access and refresh tokens
         if os.path.exists(token_path):
-            with open(token_path, "rb") as token:
-                creds = pickle.load(token)
+            try:
+                creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+            except ValueError as e:
+                # Tokens written by older versions were pickled; re-authorize
+                logger.warning(f"Ignoring unreadable token file {token_path}: {e}")
 
         # If there are no valid credentials, let the user log in
         if not creds or not creds.valid:
@@ -43,11 +46,13 @@ def get_calendar_service(
                 creds = flow.run_local_server(port=0)
 
             # Save the credentials for the next run
-            with open(token_path, "wb") as token:
-                pickle.dump(creds, token)
+            with open(token_path, "w") as token:
+                token.write(creds.to_json())
 
         # Build and return the service
-        service = build("calendar", "v3", credentials=creds)
+        service = build(
+            "calendar", "v3", credentials=creds, static_discovery=True, cache_discovery=False
+        )
         return service
 
     except Exception as e:
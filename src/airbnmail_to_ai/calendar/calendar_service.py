@@ -2,7 +2,7 @@
 
 import datetime
 import re
-from typing import Dict, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
 from loguru import logger
 
@@ -102,10 +102,75 @@ class CalendarService:
                 logger.error("Could not connect to Google Calendar")
                 return None
 
-        try:
-            # Check if this notification is already in the database
-            existing_notification = self.db.get_notification(notification.notification_id)
+        # Check if this notification is already in the database
+        existing_notification = self.db.get_notification(notification.notification_id)
+
+        return self._add_booking(notification, calendar_id, existing_notification, save=True)
+
+    def add_bookings_to_calendar(
+        self, notifications: List[AirbnbNotification], calendar_id: str = "primary"
+    ) -> List[Optional[str]]:
+        """Add several Airbnb bookings to Google Calendar.
+
+        The notifications are saved to the database in one transaction rather
+        than one at a time.
 
+        Args:
+            notifications: Parsed AirbnbNotification objects
+            calendar_id: Google Calendar ID to add the events to (default: primary)
+
+        Returns:
+            Event ID, or None if adding the booking failed, for each notification
+            in the same order as ``notifications``
+        """
+        if not self.service:
+            if not self.connect():
+                logger.error("Could not connect to Google Calendar")
+                return [None] * len(notifications)
+
+        # Read the stored versions before saving, to detect changes to existing events
+        existing_notifications = {
+            n.notification_id: n
+            for n in self.db.get_notifications_by_ids(
+                [notification.notification_id for notification in notifications]
+            )
+        }
+
+        if not self.db.save_notifications(notifications):
+            logger.error("Failed to save notifications to database")
+            # Continue anyway, as we still want to try adding to calendar
+
+        return [
+            self._add_booking(
+                notification,
+                calendar_id,
+                existing_notifications.get(notification.notification_id),
+                save=False,
+            )
+            for notification in notifications
+        ]
+
+    def _add_booking(
+        self,
+        notification: AirbnbNotification,
+        calendar_id: str,
+        existing_notification: Optional[AirbnbNotification],
+        save: bool,
+    ) -> Optional[str]:
+        """Add an Airbnb booking to Google Calendar once connected.
+
+        Args:
+            notification: Parsed AirbnbNotification object
+            calendar_id: Google Calendar ID to add the event to
+            existing_notification: The version of the notification stored before
+                this call, or None if it was not stored
+            save: Whether to save the notification to the database. False when
+                the caller has already saved it.
+
+        Returns:
+            Event ID if successful, None otherwise
+        """
+        try:
             # Check if this notification is already in the calendar
             existing_event = self.db.get_calendar_event(notification.notification_id)
 
@@ -144,7 +209,7 @@ class CalendarService:
                     # Continue to create a new event with updated information
 
             # Save notification to database (either new or updated)
-            if not self.db.save_notification(notification):
+            if save and not self.db.save_notification(notification):
                 logger.error(f"Failed to save notification {notification.notification_id} to database")
                 # Continue anyway, as we still want to try adding to calendar
 
@@ -198,8 +263,8 @@ class CalendarService:
             if llm_check_in_date and llm_check_out_date and notification.llm_confidence in ["high", "medium"]:
                 logger.info("Using LLM-extracted dates")
                 try:
-                    check_in_date = datetime.datetime.strptime(llm_check_in_date, "%Y-%m-%d")
-                    check_out_date = datetime.datetime.strptime(llm_check_out_date, "%Y-%m-%d")
+                    check_in_date = datetime.datetime.fromisoformat(llm_check_in_date)
+                    check_out_date = datetime.datetime.fromisoformat(llm_check_out_date)
                 except ValueError:
                     logger.warning("Failed to parse LLM dates, falling back to regex-extracted dates")
                     check_in_date = self.parse_date_from_string(notification.check_in)
@@ -70,6 +70,16 @@ def setup_calendar_parser(subparsers: Any) -> None:
         "--api-key",
         help="API key for Anthropic Claude API (default: uses ANTHROPIC_API_KEY environment variable)",
     )
+    calendar_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Analyze every email with the LLM, ignoring cached analysis results",
+    )
+    calendar_parser.add_argument(
+        "--skip-processed",
+        action="store_true",
+        help="Skip emails that are already stored in the database, without fetching them",
+    )
     calendar_parser.set_defaults(func=calendar_command)
 
 
@@ -101,7 +111,11 @@ def calendar_command(args: argparse.Namespace) -> None:
             sys.exit(1)
 
         # Fetch messages matching the query
-        messages = gmail.get_messages(query=args.query, max_results=args.limit)
+        messages = gmail.get_messages(
+            query=args.query,
+            max_results=args.limit,
+            db=calendar.db if args.skip_processed else None,
+        )
 
         if not messages:
             logger.info("No booking confirmation emails found")
@@ -139,17 +153,22 @@ def process_booking_confirmations(
     """
     success_count = 0
 
-    for msg in messages:
-        logger.info("Processing email: {}", msg['subject'])
+    # Parse emails with LLM analysis, several emails per request
+    notifications = email_parser.parse_emails(messages, use_cache=not args.no_cache)
 
-        # Parse email with LLM analysis
-        notification = email_parser.parse_email(msg)
-        if not notification:
+    parsed = []
+    for msg, notification in zip(messages, notifications, strict=True):
+        if notification:
+            parsed.append((msg, notification))
+        else:
             logger.warning("Failed to parse email: {}", msg['subject'])
-            continue
 
-        # Add booking to calendar
-        event_id = calendar.add_booking_to_calendar(notification)
+    # Add bookings to calendar, saving the notifications in one transaction
+    event_ids = calendar.add_bookings_to_calendar([notification for _, notification in parsed])
+
+    for (msg, notification), event_id in zip(parsed, event_ids, strict=True):
+        logger.info("Processing email: {}", msg['subject'])
+
         if event_id:
             success_count += 1
 
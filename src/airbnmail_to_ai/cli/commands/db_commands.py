@@ -3,6 +3,7 @@
 import argparse
 import json
 import sys
+from datetime import datetime
 from typing import Any
 
 import yaml
@@ -41,6 +42,14 @@ def setup_db_parser(subparsers: Any) -> None:
         default=0,
         help="Number of notifications to skip (default: 0)",
     )
+    list_parser.add_argument(
+        "--before",
+        nargs=2,
+        metavar=("RECEIVED_AT", "NOTIFICATION_ID"),
+        help="Only list notifications that come after this ISO timestamp and "
+        "notification ID (pass the values printed as the next page cursor of "
+        "the previous page; use an empty RECEIVED_AT for notifications without one)",
+    )
     list_parser.add_argument(
         "--output",
         choices=["json", "yaml", "text"],
@@ -134,8 +143,28 @@ def handle_list_command(db: DatabaseService, args: argparse.Namespace) -> None:
         db: DatabaseService instance
         args: Command line arguments
     """
-    logger.info("Listing notifications (limit: {}, offset: {})", args.limit, args.offset)
-    notifications = db.get_all_notifications(limit=args.limit, offset=args.offset)
+    logger.info(
+        "Listing notifications (limit: {}, offset: {}, before: {})",
+        args.limit,
+        args.offset,
+        args.before,
+    )
+    before = None
+    if args.before:
+        received_at, notification_id = args.before
+        # Accept any ISO format but compare against the stored representation
+        before = (
+            datetime.fromisoformat(received_at).isoformat() if received_at else None,
+            notification_id,
+        )
+
+    notifications = db.get_all_notifications(
+        limit=args.limit,
+        offset=args.offset,
+        before=before,
+        # Message bodies are only shown in the structured output formats
+        include_body=args.output != "text",
+    )
 
     if not notifications:
         logger.info("No notifications found in the database")
@@ -162,11 +191,15 @@ def handle_list_command(db: DatabaseService, args: argparse.Namespace) -> None:
                 print(f"  Guest: {notification.guest_name}")
             if notification.check_in and notification.check_out:
                 print(f"  Stay: {notification.check_in} to {notification.check_out}")
-            if db.has_calendar_event(notification.notification_id):
-                cal_event = db.get_calendar_event(notification.notification_id)
+            cal_event = db.get_calendar_event(notification.notification_id)
+            if cal_event:
                 print(f"  Calendar Event: {cal_event['event_id']}")
             print("-" * 80)
 
+        last = notifications[-1]
+        received_at = last.received_at.isoformat() if last.received_at else ""
+        print(f"Next page: --before '{received_at}' {last.notification_id}")
+
 
 def handle_view_command(db: DatabaseService, args: argparse.Namespace) -> None:
     """Handle the view command.
@@ -212,8 +245,8 @@ def handle_view_command(db: DatabaseService, args: argparse.Namespace) -> None:
             print(f"Amount: {notification.currency or ''}{notification.amount}")
 
         # Check if this notification has a calendar event
-        if db.has_calendar_event(notification.notification_id):
-            cal_event = db.get_calendar_event(notification.notification_id)
+        cal_event = db.get_calendar_event(notification.notification_id)
+        if cal_event:
             print(f"\nCalendar Event: {cal_event['event_id']}")
             print(f"Calendar ID: {cal_event['calendar_id']}")
             print(f"Created at: {cal_event['created_at']}")
@@ -59,6 +59,11 @@ def setup_fetch_parser(subparsers: Any) -> None:
         action="store_true",
         help="Parse email content for Airbnb notification data",
     )
+    fetch_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Analyze every email with the LLM, ignoring cached analysis results",
+    )
     fetch_parser.add_argument(
         "--credentials",
         default="credentials.json",
@@ -138,10 +143,16 @@ def process_messages(
         List of processed message dictionaries
     """
     results = []
-    for msg in messages:
+
+    # Parse emails with LLM analysis, several emails per request
+    parsed_notifications = (
+        email_parser.parse_emails(messages, use_cache=not args.no_cache)
+        if args.parse
+        else [None] * len(messages)
+    )
+
+    for msg, parsed_data in zip(messages, parsed_notifications, strict=True):
         if args.parse:
-            # Parse email with LLM analysis
-            parsed_data = email_parser.parse_email(msg)
             if parsed_data:
                 results.append(
                     {
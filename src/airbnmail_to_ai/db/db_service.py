@@ -1,18 +1,162 @@
 """SQLite database service for Airbnb notifications and calendar events."""
 
-import json
 import os
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
 
 from airbnmail_to_ai.models.notification import AirbnbNotification, NotificationType
 from airbnmail_to_ai.utils.logging import get_logger
+from airbnmail_to_ai.utils.serialization import json_dumps, json_loads
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Columns of airbnb_notifications that map to AirbnbNotification fields, in table order
+_NOTIFICATION_COLUMNS = (
+    "notification_id",
+    "notification_type",
+    "subject",
+    "received_at",
+    "sender",
+    "raw_text",
+    "raw_html",
+    "reservation_id",
+    "property_name",
+    "guest_name",
+    "check_in",
+    "check_out",
+    "num_guests",
+    "amount",
+    "currency",
+    "cancellation_reason",
+    "sender_name",
+    "message_content",
+    "reviewer_name",
+    "rating",
+    "review_content",
+    "llm_analysis",
+    "llm_confidence",
+)
+
+# Columns used for listing notifications, leaving out the large message bodies
+_SUMMARY_COLUMNS = tuple(
+    column for column in _NOTIFICATION_COLUMNS if column not in ("raw_text", "raw_html")
+)
+
+# Stay below SQLite's default limit of 999 bound parameters per statement
+_MAX_QUERY_PARAMS = 900
+
+_UPSERT_NOTIFICATION_QUERY = f'''
+    INSERT INTO airbnb_notifications
+    ({", ".join(_NOTIFICATION_COLUMNS)}, created_at)
+    VALUES ({", ".join("?" for _ in _NOTIFICATION_COLUMNS)}, ?)
+    ON CONFLICT(notification_id) DO UPDATE SET
+    {", ".join(
+        f"{column} = COALESCE(excluded.{column}, {column})"
+        for column in _NOTIFICATION_COLUMNS[1:]
+    )},
+    created_at = excluded.created_at
+'''
+
+
+def _notification_row(notification: AirbnbNotification, now: str) -> Tuple[Any, ...]:
+    """Build the parameter tuple for inserting a notification.
+
+    Args:
+        notification: The AirbnbNotification object to convert.
+        now: Timestamp to store in the created_at column.
+
+    Returns:
+        Tuple of column values in _NOTIFICATION_COLUMNS order, followed by created_at.
+    """
+    n = notification
+    return (
+        n.notification_id,
+        n.notification_type.value,
+        n.subject,
+        n.received_at.isoformat() if n.received_at else None,
+        n.sender,
+        n.raw_text,
+        n.raw_html,
+        n.reservation_id,
+        n.property_name,
+        n.guest_name,
+        n.check_in,
+        n.check_out,
+        n.num_guests,
+        n.amount,
+        n.currency,
+        n.cancellation_reason,
+        n.sender_name,
+        n.message_content,
+        n.reviewer_name,
+        n.rating,
+        n.review_content,
+        json_dumps(n.llm_analysis) if n.llm_analysis else None,
+        n.llm_confidence,
+        now,
+    )
+
+
+def _chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most ``size`` items.
+
+    Args:
+        items: The list to split.
+        size: Maximum chunk size.
+
+    Returns:
+        List of chunks.
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _row_to_notification(row: Mapping[str, Any]) -> AirbnbNotification:
+    """Convert an airbnb_notifications row to an AirbnbNotification.
+
+    Rows were written by save_notification, so they are trusted and the model
+    is built with model_construct to skip Pydantic validation.
+
+    Args:
+        row: Database row keyed by column name.
+
+    Returns:
+        AirbnbNotification built from the row.
+    """
+    notification_dict = dict(row)
+
+    # Remove created_at field (not part of AirbnbNotification model)
+    notification_dict.pop("created_at", None)
+
+    return _dict_to_notification(notification_dict)
+
+
+def _dict_to_notification(notification_dict: Dict[str, Any]) -> AirbnbNotification:
+    """Convert column values keyed by column name to an AirbnbNotification.
+
+    Message bodies that were not selected are filled in as empty strings.
+
+    Args:
+        notification_dict: Column values keyed by column name. Modified in place.
+
+    Returns:
+        AirbnbNotification built from the values.
+    """
+    notification_dict.setdefault("raw_text", "")
+    notification_dict.setdefault("raw_html", "")
+
+    # Restore the types that validation would otherwise have produced
+    notification_dict["notification_type"] = NotificationType(notification_dict["notification_type"])
+    if notification_dict.get("received_at"):
+        notification_dict["received_at"] = datetime.fromisoformat(notification_dict["received_at"])
+    if notification_dict.get("llm_analysis"):
+        notification_dict["llm_analysis"] = json_loads(notification_dict["llm_analysis"])
+
+    return AirbnbNotification.model_construct(**notification_dict)
+
 
 class DatabaseService:
     """Service for managing SQLite database for Airbnb notifications."""
@@ -24,10 +168,47 @@ class DatabaseService:
             db_path: Path to the SQLite database file.
         """
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+
+        # Each thread gets its own connection and cursor, opened on first use
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
         self._initialize_db()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Database connection for the current thread."""
+        return self._get_conn()
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """Database cursor for the current thread."""
+        self._get_conn()
+        cursor: sqlite3.Cursor = self._local.cursor
+        return cursor
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the current thread's connection, opening it if needed.
+
+        Returns:
+            sqlite3.Connection: The connection owned by the current thread.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            # WAL lets readers in other threads proceed while a write is in progress
+            conn.execute("PRAGMA journal_mode=WAL")
+
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
     def _initialize_db(self) -> None:
         """Initialize the SQLite database and create tables if they don't exist."""
         try:
@@ -36,11 +217,6 @@ class DatabaseService:
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir)
 
-            # Connect to database
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            self.cursor = self.conn.cursor()
-
             # Create tables if they don't exist
             self.cursor.execute('''
                 CREATE TABLE IF NOT EXISTS airbnb_notifications (
@@ -82,21 +258,35 @@ class DatabaseService:
                 )
             ''')
 
+            # Index the booking details used by find_duplicate_notifications
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_notif_dup
+                ON airbnb_notifications(property_name, check_in, check_out, guest_name)
+            ''')
+
+            # Index the (received_at, notification_id) sort key of get_all_notifications.
+            # It replaces the earlier received_at-only index.
+            self.cursor.execute("DROP INDEX IF EXISTS idx_notif_received")
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_notif_received_id
+                ON airbnb_notifications(received_at DESC, notification_id DESC)
+            ''')
+
             self.conn.commit()
             logger.info(f"Initialized database at {self.db_path}")
 
         except Exception as e:
             logger.exception(f"Error initializing database: {e}")
-            if self.conn:
-                self.conn.close()
+            self.close()
             raise
 
     def close(self) -> None:
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
-            self.cursor = None
+        """Close the database connections of all threads."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._local = threading.local()
 
     def save_notification(self, notification: AirbnbNotification) -> bool:
         """Save an Airbnb notification to the database.
@@ -109,75 +299,50 @@ class DatabaseService:
             bool: True if saved successfully or updated, False otherwise.
         """
         try:
-            # Convert notification to dictionary
-            notification_dict = notification.to_dict()
-
-            # Convert llm_analysis to JSON string if it exists
-            if notification_dict.get("llm_analysis"):
-                notification_dict["llm_analysis"] = json.dumps(notification_dict["llm_analysis"])
-
-            # Set created_at timestamp (for new notifications) or update timestamp
             now = datetime.now().isoformat()
 
-            # Check if this notification already exists
-            existing = self.get_notification(notification.notification_id)
+            # Insert the notification, or update it in place if it already exists.
+            # Fields that are None in the new notification keep their stored value.
+            self.cursor.execute(_UPSERT_NOTIFICATION_QUERY, _notification_row(notification, now))
+            self.conn.commit()
 
-            if existing:
-                logger.info(f"Updating existing notification {notification.notification_id} in database")
+            logger.info(f"Saved notification {notification.notification_id} to database")
+            return True
 
-                # Extract fields and values for update
-                update_items = []
-                values = []
+        except Exception as e:
+            logger.exception(f"Error saving notification {notification.notification_id}: {e}")
+            self.conn.rollback()
+            return False
 
-                for field, value in notification_dict.items():
-                    if field != "notification_id":  # Don't update primary key
-                        update_items.append(f"{field} = ?")
-                        values.append(value)
+    def save_notifications(self, notifications: List[AirbnbNotification]) -> bool:
+        """Save several Airbnb notifications in a single transaction.
 
-                # Add notification_id at the end for WHERE clause
-                values.append(notification.notification_id)
+        Existing notifications are updated the same way as in save_notification.
 
-                # Construct update query
-                query = f'''
-                    UPDATE airbnb_notifications
-                    SET {", ".join(update_items)}, created_at = ?
-                    WHERE notification_id = ?
-                '''
+        Args:
+            notifications: The AirbnbNotification objects to save.
 
-                # Add timestamp to values
-                values.insert(-1, now)
+        Returns:
+            bool: True if all notifications were saved, False otherwise.
+        """
+        if not notifications:
+            return True
 
-                # Execute update query
-                self.cursor.execute(query, values)
-                self.conn.commit()
+        try:
+            # All rows of a batch share one created_at timestamp
+            now = datetime.now().isoformat()
 
-                logger.info(f"Updated notification {notification.notification_id} in database")
-                return True
-            else:
-                # Set created_at timestamp for new notification
-                notification_dict["created_at"] = now
-
-                # Extract fields for insertion
-                fields = list(notification_dict.keys())
-                placeholders = ["?" for _ in fields]
-                values = [notification_dict[field] for field in fields]
-
-                # Construct insert query
-                query = f'''
-                    INSERT INTO airbnb_notifications
-                    ({", ".join(fields)})
-                    VALUES ({", ".join(placeholders)})
-                '''
-
-                # Execute insert query
-                self.cursor.execute(query, values)
-                self.conn.commit()
+            self.cursor.execute("BEGIN")
+            self.cursor.executemany(
+                _UPSERT_NOTIFICATION_QUERY, [_notification_row(n, now) for n in notifications]
+            )
+            self.cursor.execute("COMMIT")
 
-                logger.info(f"Saved new notification {notification.notification_id} to database")
-                return True
+            logger.info(f"Saved {len(notifications)} notifications to database")
+            return True
 
         except Exception as e:
-            logger.exception(f"Error saving notification {notification.notification_id}: {e}")
+            logger.exception(f"Error saving {len(notifications)} notifications: {e}")
             self.conn.rollback()
             return False
 
@@ -198,25 +363,37 @@ class DatabaseService:
             if not row:
                 return None
 
-            # Convert to dictionary
-            notification_dict = dict(row)
+            return _row_to_notification(row)
+
+        except Exception as e:
+            logger.exception(f"Error retrieving notification {notification_id}: {e}")
+            return None
 
-            # Convert llm_analysis from JSON string back to dictionary if it exists
-            if notification_dict.get("llm_analysis"):
-                notification_dict["llm_analysis"] = json.loads(notification_dict["llm_analysis"])
+    def get_notifications_by_ids(self, notification_ids: List[str]) -> List[AirbnbNotification]:
+        """Get several Airbnb notifications from the database in one query per chunk.
 
-            # Remove created_at field (not part of AirbnbNotification model)
-            notification_dict.pop("created_at", None)
+        Args:
+            notification_ids: The notification IDs to retrieve.
 
-            # Convert enum string to NotificationType enum
-            notification_dict["notification_type"] = NotificationType(notification_dict["notification_type"])
+        Returns:
+            List[AirbnbNotification]: The notifications found, in the order of the given IDs.
+        """
+        try:
+            found = {}
+            for chunk in _chunked(notification_ids, _MAX_QUERY_PARAMS):
+                query = (
+                    "SELECT * FROM airbnb_notifications WHERE notification_id IN "
+                    f"({', '.join('?' for _ in chunk)})"
+                )
+                self.cursor.execute(query, chunk)
+                for row in self.cursor.fetchall():
+                    found[row["notification_id"]] = _row_to_notification(row)
 
-            # Create AirbnbNotification object
-            return AirbnbNotification(**notification_dict)
+            return [found[nid] for nid in notification_ids if nid in found]
 
         except Exception as e:
-            logger.exception(f"Error retrieving notification {notification_id}: {e}")
-            return None
+            logger.exception(f"Error retrieving notifications by ID: {e}")
+            return []
 
     def save_calendar_event(
         self, notification_id: str, event_id: str, calendar_id: str = "primary"
@@ -326,6 +503,29 @@ class DatabaseService:
             logger.exception(f"Error checking if notification {notification_id} exists: {e}")
             return False
 
+    def get_existing_ids(self, notification_ids: List[str]) -> Set[str]:
+        """Get which of the given notification IDs are already stored.
+
+        Args:
+            notification_ids: The notification IDs to check.
+
+        Returns:
+            Set[str]: The subset of IDs present in the database.
+        """
+        try:
+            existing: Set[str] = set()
+            for chunk in _chunked(notification_ids, _MAX_QUERY_PARAMS):
+                query = (
+                    "SELECT notification_id FROM airbnb_notifications WHERE notification_id IN "
+                    f"({', '.join('?' for _ in chunk)})"
+                )
+                self.cursor.execute(query, chunk)
+                existing.update(row[0] for row in self.cursor.fetchall())
+            return existing
+        except Exception as e:
+            logger.exception(f"Error checking which notifications exist: {e}")
+            return set()
+
     def has_calendar_event(self, notification_id: str) -> bool:
         """Check if a notification has an associated calendar event.
 
@@ -345,6 +545,31 @@ class DatabaseService:
             logger.exception(f"Error checking if notification {notification_id} has calendar event: {e}")
             return False
 
+    def get_notification_state(self, notification_id: str) -> Tuple[bool, bool]:
+        """Check whether a notification is stored and has a calendar event in one query.
+
+        Args:
+            notification_id: The notification ID to check.
+
+        Returns:
+            Tuple[bool, bool]: Whether the notification exists and whether it has
+                a calendar event.
+        """
+        try:
+            self.cursor.execute(
+                """
+                SELECT
+                    EXISTS (SELECT 1 FROM airbnb_notifications WHERE notification_id = ?),
+                    EXISTS (SELECT 1 FROM calendar_events WHERE notification_id = ?)
+                """,
+                (notification_id, notification_id)
+            )
+            exists, has_event = self.cursor.fetchone()
+            return bool(exists), bool(has_event)
+        except Exception as e:
+            logger.exception(f"Error checking state of notification {notification_id}: {e}")
+            return False, False
+
     def find_duplicate_notifications(
         self, property_name: str, check_in: str, check_out: str, guest_name: str
     ) -> List[AirbnbNotification]:
@@ -372,65 +597,71 @@ class DatabaseService:
             rows = self.cursor.fetchall()
 
             # Convert rows to AirbnbNotification objects
-            notifications = []
-            for row in rows:
-                notification_dict = dict(row)
-
-                # Convert llm_analysis from JSON string back to dictionary if it exists
-                if notification_dict.get("llm_analysis"):
-                    notification_dict["llm_analysis"] = json.loads(notification_dict["llm_analysis"])
-
-                # Remove created_at field (not part of AirbnbNotification model)
-                notification_dict.pop("created_at", None)
-
-                # Convert enum string to NotificationType enum
-                notification_dict["notification_type"] = NotificationType(notification_dict["notification_type"])
-
-                # Create AirbnbNotification object
-                notifications.append(AirbnbNotification(**notification_dict))
-
-            return notifications
+            return [_row_to_notification(row) for row in rows]
 
         except Exception as e:
             logger.exception(f"Error finding duplicate notifications: {e}")
             return []
 
     def get_all_notifications(
-        self, limit: int = 100, offset: int = 0
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        include_body: bool = False,
+        before: Optional[Tuple[Optional[str], str]] = None,
     ) -> List[AirbnbNotification]:
-        """Get all Airbnb notifications from the database.
+        """Get all Airbnb notifications from the database, newest first.
+
+        Notifications are ordered by received_at, then notification_id, both
+        descending. Notifications without a received_at come last.
+
+        For paging through many notifications, pass the received_at (as an ISO
+        timestamp, or None) and notification_id of the last notification of the
+        previous page as ``before`` rather than an offset. This seeks directly in
+        the index instead of skipping rows.
 
         Args:
             limit: Maximum number of notifications to retrieve.
             offset: Number of notifications to skip.
+            include_body: Whether to load raw_text and raw_html. When False they
+                are left as empty strings.
+            before: Only return notifications that sort after this
+                (received_at, notification_id) pair.
 
         Returns:
             List[AirbnbNotification]: List of Airbnb notifications.
         """
         try:
-            query = "SELECT * FROM airbnb_notifications ORDER BY received_at DESC LIMIT ? OFFSET ?"
-            self.cursor.execute(query, (limit, offset))
-            rows = self.cursor.fetchall()
-
-            # Convert rows to AirbnbNotification objects
-            notifications = []
-            for row in rows:
-                notification_dict = dict(row)
-
-                # Convert llm_analysis from JSON string back to dictionary if it exists
-                if notification_dict.get("llm_analysis"):
-                    notification_dict["llm_analysis"] = json.loads(notification_dict["llm_analysis"])
-
-                # Remove created_at field (not part of AirbnbNotification model)
-                notification_dict.pop("created_at", None)
-
-                # Convert enum string to NotificationType enum
-                notification_dict["notification_type"] = NotificationType(notification_dict["notification_type"])
+            columns = _NOTIFICATION_COLUMNS if include_body else _SUMMARY_COLUMNS
+            where = ""
+            params: List[Any] = []
+            if before is not None:
+                received_at, notification_id = before
+                if received_at is None:
+                    where = "WHERE received_at IS NULL AND notification_id < ? "
+                    params.append(notification_id)
+                else:
+                    where = (
+                        "WHERE (received_at < ? "
+                        "OR (received_at = ? AND notification_id < ?) "
+                        "OR received_at IS NULL) "
+                    )
+                    params.extend((received_at, received_at, notification_id))
+            params.extend((limit, offset))
 
-                # Create AirbnbNotification object
-                notifications.append(AirbnbNotification(**notification_dict))
+            query = (
+                f"SELECT {', '.join(columns)} FROM airbnb_notifications "
+                f"{where}ORDER BY received_at DESC, notification_id DESC LIMIT ? OFFSET ?"
+            )
+            # Plain tuples are cheaper to build than sqlite3.Row objects
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(query, params).fetchall()
 
-            return notifications
+            # Convert rows to AirbnbNotification objects
+            return [
+                _dict_to_notification(dict(zip(columns, row, strict=True))) for row in rows
+            ]
 
         except Exception as e:
             logger.exception(f"Error retrieving notifications: {e}")
@@ -2,10 +2,11 @@
 
 import base64
 import os.path
-import pickle
+from collections import OrderedDict
 from email.mime.text import MIMEText
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -14,6 +15,8 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from loguru import logger
 
+from airbnmail_to_ai.db.db_service import DatabaseService
+
 
 class GmailService:
     """Service for interacting with Gmail API."""
@@ -21,6 +24,21 @@ class GmailService:
     # If modifying these scopes, delete the token file.
     SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
 
+    # Maximum number of message details kept in memory
+    MESSAGE_CACHE_SIZE = 2048
+
+    # Gmail accepts at most 100 calls in a single batch request
+    BATCH_SIZE = 100
+
+    # Partial response mask for messages.get, limited to the fields we parse.
+    # Parts are requested two levels deep, e.g. text bodies in a
+    # multipart/alternative part of a multipart/mixed message.
+    MESSAGE_FIELDS = (
+        "id,threadId,labelIds,"
+        "payload(mimeType,headers(name,value),body/data,"
+        "parts(mimeType,body/data,parts(mimeType,body/data)))"
+    )
+
     def __init__(
         self, credentials_path: str = "credentials.json", token_path: str = "token.json"
     ) -> None:
@@ -32,7 +50,12 @@ class GmailService:
         """
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self.service = self._get_gmail_service()
+        self._message_cache: OrderedDict[Tuple[str, bool], Dict[str, Any]] = OrderedDict()
+
+    @cached_property
+    def service(self) -> Any:
+        """Authorized Gmail API service, built on first use."""
+        return self._get_gmail_service()
 
     def _get_gmail_service(self) -> Any:
         """Get an authorized Gmail API service instance.
@@ -48,8 +71,11 @@ class GmailService:
 
         # Check if token file exists
         if os.path.exists(self.token_path):
-            with open(self.token_path, "rb") as token:
-                creds = pickle.load(token)
+            try:
+                creds = Credentials.from_authorized_user_file(self.token_path, self.SCOPES)
+            except ValueError as e:
+                # Tokens written by older versions were pickled; re-authorize
+                logger.warning(f"Ignoring unreadable token file {self.token_path}: {e}")
 
         # If credentials don't exist or are invalid, get new ones
         if not creds or not creds.valid:
@@ -68,36 +94,50 @@ class GmailService:
                 creds = flow.run_local_server(port=0)
 
             # Save the credentials for the next run
-            with open(self.token_path, "wb") as token:
-                pickle.dump(creds, token)
+            with open(self.token_path, "w") as token:
+                token.write(creds.to_json())
 
         try:
             # Build the Gmail service
-            service = build("gmail", "v1", credentials=creds)
+            # Use the discovery document bundled with the client library
+            service = build(
+                "gmail", "v1", credentials=creds, static_discovery=True, cache_discovery=False
+            )
             return service
         except Exception as e:
             logger.exception(f"Failed to build Gmail service: {e}")
             raise
 
-    def get_message(self, msg_id: str) -> Optional[Dict[str, Any]]:
+    def get_message(self, msg_id: str, want_html: bool = False) -> Optional[Dict[str, Any]]:
         """Get a single message by ID.
 
         Args:
             msg_id: The ID of the message.
+            want_html: Whether to decode the HTML body alongside the plain text.
+                Defaults to False.
 
         Returns:
             Dictionary with message details or None if an error occurs.
         """
-        return self._get_message_detail(msg_id)
+        return self._get_message_detail(msg_id, want_html)
 
     def get_messages(
-        self, query: str = "from:airbnb.com is:unread", max_results: int = 50
+        self,
+        query: str = "from:airbnb.com is:unread",
+        max_results: int = 50,
+        db: Optional[DatabaseService] = None,
+        want_html: bool = False,
     ) -> List[Dict[str, Any]]:
         """Get messages matching the specified query.
 
         Args:
             query: Gmail search query. Defaults to "from:airbnb.com is:unread".
             max_results: Maximum number of messages to return. Defaults to 50.
+            db: Optional database of processed notifications. Messages already
+                stored there are skipped without fetching their details.
+            want_html: Whether to decode the HTML body alongside the plain text.
+                The HTML body is always decoded for messages that have no
+                plain text part. Defaults to False.
 
         Returns:
             List of message dictionaries with the following keys:
@@ -107,7 +147,7 @@ class GmailService:
             - from: The sender email
             - date: The date the email was received
             - body_text: Plain text body
-            - body_html: HTML body (if available)
+            - body_html: HTML body (if requested or no plain text body exists)
             - labels: List of labels attached to the message
 
         Raises:
@@ -122,77 +162,191 @@ class GmailService:
                 .execute()
             )
 
-            messages = []
-            if "messages" in response:
-                for message in response["messages"]:
-                    msg_detail = self._get_message_detail(message["id"])
-                    if msg_detail:
-                        messages.append(msg_detail)
+            msg_ids = [message["id"] for message in response.get("messages", [])]
 
-            return messages
+            # Skip messages that have already been stored as notifications
+            if db is not None and msg_ids:
+                known_ids = db.get_existing_ids(msg_ids)
+                if known_ids:
+                    logger.debug(f"Skipping {len(known_ids)} messages already in the database")
+                    msg_ids = [msg_id for msg_id in msg_ids if msg_id not in known_ids]
+
+            details = self._get_message_details(msg_ids, want_html)
+            return [details[msg_id] for msg_id in msg_ids if msg_id in details]
 
         except HttpError as e:
             logger.exception(f"An error occurred while getting messages: {e}")
             return []
 
-    def _get_message_detail(self, msg_id: str) -> Optional[Dict[str, Any]]:
+    def _get_message_detail(
+        self, msg_id: str, want_html: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """Get detailed information about a message.
 
         Args:
             msg_id: The ID of the message.
+            want_html: Whether to decode the HTML body. Defaults to False.
 
         Returns:
             Dictionary with message details or None if an error occurs.
         """
+        cached = self._get_cached_message((msg_id, want_html))
+        if cached is not None:
+            return cached
+
         try:
             # Get the message details
             message = (
                 self.service.users()
                 .messages()
-                .get(userId="me", id=msg_id, format="full")
+                .get(userId="me", id=msg_id, format="full", fields=self.MESSAGE_FIELDS)
                 .execute()
             )
-
-            headers = {}
-            for header in message["payload"]["headers"]:
-                headers[header["name"].lower()] = header["value"]
-
-            # Process the message parts to get the body
-            body_text = ""
-            body_html = ""
-            if "parts" in message["payload"]:
-                parts = message["payload"]["parts"]
-                for part in parts:
-                    if part["mimeType"] == "text/plain":
-                        body_text = self._get_body_text(part)
-                    elif part["mimeType"] == "text/html":
-                        body_html = self._get_body_text(part)
-            else:
-                # Handle messages without parts
-                if message["payload"]["mimeType"] == "text/plain":
-                    body_text = self._get_body_text(message["payload"])
-                elif message["payload"]["mimeType"] == "text/html":
-                    body_html = self._get_body_text(message["payload"])
-
-            # Construct the result dictionary
-            result = {
-                "id": msg_id,
-                "thread_id": message["threadId"],
-                "subject": headers.get("subject", ""),
-                "from": headers.get("from", ""),
-                "to": headers.get("to", ""),
-                "date": headers.get("date", ""),
-                "body_text": body_text,
-                "body_html": body_html,
-                "labels": message.get("labelIds", []),
-            }
-
+            result = self._parse_message(msg_id, message, want_html)
+            self._cache_message((msg_id, want_html), result)
             return result
 
         except HttpError as e:
             logger.exception(f"An error occurred while getting message details: {e}")
             return None
 
+    def _get_message_details(
+        self, msg_ids: List[str], want_html: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get detailed information about several messages.
+
+        Messages that are not cached are fetched with Gmail batch requests, so
+        each round-trip retrieves up to BATCH_SIZE messages.
+
+        Args:
+            msg_ids: The IDs of the messages.
+            want_html: Whether to decode the HTML bodies. Defaults to False.
+
+        Returns:
+            Dictionary mapping message ID to message details. Messages that
+            could not be fetched are left out.
+        """
+        details: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for msg_id in msg_ids:
+            cached = self._get_cached_message((msg_id, want_html))
+            if cached is not None:
+                details[msg_id] = cached
+            else:
+                missing.append(msg_id)
+
+        def handle_response(request_id: str, response: Any, exception: Any) -> None:
+            if exception is not None:
+                logger.error(f"An error occurred while getting message {request_id}: {exception}")
+                return
+            result = self._parse_message(request_id, response, want_html)
+            self._cache_message((request_id, want_html), result)
+            details[request_id] = result
+
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=handle_response)
+            for msg_id in missing[start : start + self.BATCH_SIZE]:
+                batch.add(
+                    self.service.users()
+                    .messages()
+                    .get(userId="me", id=msg_id, format="full", fields=self.MESSAGE_FIELDS),
+                    request_id=msg_id,
+                )
+            batch.execute()
+
+        return details
+
+    def _parse_message(
+        self, msg_id: str, message: Dict[str, Any], want_html: bool = False
+    ) -> Dict[str, Any]:
+        """Build the message details dictionary from a Gmail API message resource.
+
+        Args:
+            msg_id: The ID of the message.
+            message: The message resource returned by the Gmail API.
+            want_html: Whether to decode the HTML body. When False, the HTML
+                body is only decoded if there is no plain text body.
+
+        Returns:
+            Dictionary with message details.
+        """
+        headers = {}
+        for header in message["payload"]["headers"]:
+            headers[header["name"].lower()] = header["value"]
+
+        # Process the message parts to get the body
+        body_text = ""
+        body_html = ""
+        html_part = None
+        # The first plain text and HTML parts are the message body; later ones
+        # are usually attachments
+        for part in self._iter_leaf_parts(message["payload"]):
+            if part["mimeType"] == "text/plain" and not body_text:
+                body_text = self._get_body_text(part)
+            elif part["mimeType"] == "text/html" and html_part is None:
+                html_part = part
+
+        # HTML bodies are much larger, so only decode them when needed
+        if html_part is not None and (want_html or not body_text):
+            body_html = self._get_body_text(html_part)
+
+        # Construct the result dictionary
+        return {
+            "id": msg_id,
+            "thread_id": message["threadId"],
+            "subject": headers.get("subject", ""),
+            "from": headers.get("from", ""),
+            "to": headers.get("to", ""),
+            "date": headers.get("date", ""),
+            "body_text": body_text,
+            "body_html": body_html,
+            "labels": message.get("labelIds", []),
+        }
+
+    @classmethod
+    def _iter_leaf_parts(cls, part: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Walk the parts of a message that have no subparts, in order.
+
+        Args:
+            part: The message payload or one of its parts.
+
+        Yields:
+            Each part without subparts. A message without parts yields its payload.
+        """
+        subparts = part.get("parts")
+        if not subparts:
+            yield part
+            return
+        for subpart in subparts:
+            yield from cls._iter_leaf_parts(subpart)
+
+    def _get_cached_message(self, key: Tuple[str, bool]) -> Optional[Dict[str, Any]]:
+        """Get message details from the in-memory cache.
+
+        Args:
+            key: The message ID and whether the HTML body was decoded.
+
+        Returns:
+            A copy of the cached message details, or None on a miss.
+        """
+        cached = self._message_cache.get(key)
+        if cached is None:
+            return None
+        self._message_cache.move_to_end(key)
+        # Callers update message details, which must not change the cached entry
+        return dict(cached)
+
+    def _cache_message(self, key: Tuple[str, bool], result: Dict[str, Any]) -> None:
+        """Store message details in the in-memory cache.
+
+        Args:
+            key: The message ID and whether the HTML body was decoded.
+            result: The message details.
+        """
+        self._message_cache[key] = dict(result)
+        if len(self._message_cache) > self.MESSAGE_CACHE_SIZE:
+            self._message_cache.popitem(last=False)
+
     def _get_body_text(self, part: Dict[str, Any]) -> str:
         """Extract the body text from a message part.
 
@@ -204,7 +358,7 @@ class GmailService:
         """
         if "body" in part and "data" in part["body"]:
             data = part["body"]["data"]
-            text = base64.urlsafe_b64decode(data).decode("utf-8")
+            text = base64.urlsafe_b64decode(data).decode("utf-8", errors="replace")
             return text
         return ""
 
@@ -221,6 +375,9 @@ class GmailService:
             self.service.users().messages().modify(
                 userId="me", id=msg_id, body={"removeLabelIds": ["UNREAD"]}
             ).execute()
+            # Cached details still carry the UNREAD label
+            self._message_cache.pop((msg_id, False), None)
+            self._message_cache.pop((msg_id, True), None)
             return True
         except HttpError as e:
             logger.exception(f"An error occurred while marking message as read: {e}")
@@ -62,15 +62,10 @@ class AirbnbNotification(BaseModel):
         """Convert the notification to a dictionary.
 
         Returns:
-            Dictionary representation of the notification.
+            Dictionary representation of the notification, with the type as
+            its string value and received_at as an ISO format string.
         """
-        data = self.model_dump(exclude_none=True)
-
-        # Convert datetime to ISO format string for JSON serialization
-        if "received_at" in data and isinstance(data["received_at"], datetime):
-            data["received_at"] = data["received_at"].isoformat()
-
-        return data
+        return self.model_dump(mode="json", exclude_none=True)
 
     def get_summary(self) -> str:
         """Get a human-readable summary of the notification.
@@ -78,33 +73,21 @@ class AirbnbNotification(BaseModel):
         Returns:
             Summary string.
         """
-        summary_parts = [f"Type: {self.notification_type.value}"]
-
-        if self.reservation_id:
-            summary_parts.append(f"Reservation: {self.reservation_id}")
-
-        if self.property_name:
-            summary_parts.append(f"Property: {self.property_name}")
-
-        if self.guest_name:
-            summary_parts.append(f"Guest: {self.guest_name}")
-
-        if self.check_in and self.check_out:
-            summary_parts.append(f"Stay: {self.check_in} to {self.check_out}")
-
-        if self.num_guests:
-            summary_parts.append(f"Guests: {self.num_guests}")
-
-        if self.amount and self.currency:
-            summary_parts.append(f"Amount: {self.currency}{self.amount}")
-
-        if self.message_content:
+        message = self.message_content
+        if message and len(message) > 100:
             # Truncate long messages
-            message = (
-                f"{self.message_content[:100]}..."
-                if len(self.message_content) > 100
-                else self.message_content
-            )
-            summary_parts.append(f"Message: {message}")
-
-        return " | ".join(summary_parts)
+            message = f"{message[:100]}..."
+
+        summary_parts = (
+            f"Type: {self.notification_type.value}",
+            f"Reservation: {self.reservation_id}" if self.reservation_id else None,
+            f"Property: {self.property_name}" if self.property_name else None,
+            f"Guest: {self.guest_name}" if self.guest_name else None,
+            f"Stay: {self.check_in} to {self.check_out}"
+            if self.check_in and self.check_out
+            else None,
+            f"Guests: {self.num_guests}" if self.num_guests else None,
+            f"Amount: {self.currency}{self.amount}" if self.amount and self.currency else None,
+            f"Message: {message}" if message else None,
+        )
+        return " | ".join(part for part in summary_parts if part)
@@ -1,27 +1,114 @@
 """Module for parsing Airbnb email notifications using LLM."""
 
+import functools
 import os
 import re
+import unicodedata
 from datetime import datetime
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional
 
 from airbnmail_to_ai.models.notification import AirbnbNotification, NotificationType
 from airbnmail_to_ai.parser.llm import LLMAnalyzer
+from airbnmail_to_ai.parser.llm.cache import create_default_cache
 from airbnmail_to_ai.parser.llm.date_utils import normalize_date
 from airbnmail_to_ai.utils.logging import get_logger
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Initialize LLM Analyzer
-llm_analyzer = LLMAnalyzer(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 
+@functools.cache
+def _get_analyzer() -> LLMAnalyzer:
+    """Get the shared LLM analyzer, creating it on first use.
 
-def parse_email(email: Dict[str, Any]) -> Optional[AirbnbNotification]:
+    Creating it lazily means an ANTHROPIC_API_KEY set after import (for example
+    from the --api-key option) is still picked up.
+
+    Returns:
+        LLMAnalyzer instance.
+    """
+    return LLMAnalyzer(api_key=os.environ.get("ANTHROPIC_API_KEY"), cache=analysis_cache)
+
+
+# Cache of LLM analysis results keyed by email content
+analysis_cache = create_default_cache()
+
+# Default number of emails sent to the LLM in one request by parse_emails
+DEFAULT_BATCH_SIZE = 10
+
+# Default number of concurrent LLM requests made by parse_emails_parallel
+DEFAULT_MAX_WORKERS = 8
+
+# Notification types recognized from the subject alone, without asking the LLM.
+# Their details (dates, guests) are not needed downstream.
+DEFAULT_SKIP_LLM_FOR = frozenset(
+    {NotificationType.REVIEW, NotificationType.PAYMENT, NotificationType.REMINDER}
+)
+
+# Date part of a date string for parse_email_date, found in a single scan:
+# 2025-04-14, or 14 Apr 2025 (also inside "Mon, 14 Apr 2025")
+_DATE_PART_RE = re.compile(
+    r'(?P<iso>\d{4}-\d{2}-\d{2})'
+    r'|(?P<day>\d{1,2})\s+(?P<month>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(?P<year>\d{4})'
+)
+
+# Notification types by lowercase name, for matching the LLM's notification_type
+_NT_BY_LOWER = {nt.name.lower(): nt for nt in NotificationType}
+
+# Number of guests in the email body, e.g. "2 guests"
+_GUESTS_RE = re.compile(r'(\d+)\s+guests?\b', re.IGNORECASE)
+
+def _normalize_subject(text: str) -> str:
+    """Fold full-width characters to ASCII and case for keyword matching.
+
+    Args:
+        text: Subject line or keyword.
+
+    Returns:
+        NFKC-normalized, casefolded text.
+    """
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+# Subject keywords for each notification type, in priority order
+_NOTIFICATION_KEYWORDS = {
+    NotificationType.BOOKING_REQUEST: ("booking request", "reservation request"),
+    NotificationType.BOOKING_CONFIRMATION: ("confirmed", "confirmation", "booked", "予約確定"),
+    NotificationType.CANCELLATION: ("cancelled", "canceled", "cancellation"),
+    NotificationType.MESSAGE: ("message", "sent you"),
+    NotificationType.REVIEW: ("review", "feedback"),
+    NotificationType.REMINDER: ("reminder", "checkout", "checkin"),
+    NotificationType.PAYMENT: ("payout", "payment"),
+}
+_KEYWORD_TYPES = {
+    _normalize_subject(keyword): notification_type
+    for notification_type, keywords in _NOTIFICATION_KEYWORDS.items()
+    for keyword in keywords
+}
+_TYPE_PRIORITY = {
+    notification_type: priority
+    for priority, notification_type in enumerate(_NOTIFICATION_KEYWORDS)
+}
+# Zero-width lookahead so that overlapping keywords are all found in one scan
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in _KEYWORD_TYPES) + "))"
+)
+
+
+def parse_email(
+    email: Dict[str, Any],
+    use_cache: bool = True,
+    skip_llm_for: FrozenSet[NotificationType] = DEFAULT_SKIP_LLM_FOR,
+) -> Optional[AirbnbNotification]:
     """Parse an Airbnb email and extract relevant information using LLM.
 
     Args:
         email: Email data from the Gmail API.
+        use_cache: Whether to reuse the analysis of an identical email.
+        skip_llm_for: Notification types that are classified from the subject
+            only, without the LLM analysis.
 
     Returns:
         AirbnbNotification object or None if parsing fails.
@@ -29,56 +116,271 @@ def parse_email(email: Dict[str, Any]) -> Optional[AirbnbNotification]:
     try:
         logger.info("Parsing email with subject: {}", email.get("subject", ""))
 
-        # Extract basic email metadata
-        email_id = email.get("id", "")
-        subject = email.get("subject", "")
-        body_text = email.get("body_text", "")
+        subject_type = _get_subject_only_type(email, skip_llm_for)
+        if subject_type is not None:
+            return _build_notification(email, {}, subject_type)
 
         # Use LLM to analyze complete email (including metadata)
-        llm_results = llm_analyzer.analyze_reservation(email)
+        llm_results = _get_analyzer().analyze_reservation(email, use_cache=use_cache)
+
+        return _build_notification(email, llm_results)
+
+    except Exception as e:
+        logger.exception("Error parsing email: {}", e)
+        return None
 
-        logger.debug("LLM analysis results: {}",
-                    {k: v for k, v in llm_results.items() if k != 'analysis'})
 
-        # Get notification type from LLM analysis
+def parse_emails(
+    emails: List[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_cache: bool = True,
+    skip_llm_for: FrozenSet[NotificationType] = DEFAULT_SKIP_LLM_FOR,
+) -> List[Optional[AirbnbNotification]]:
+    """Parse several Airbnb emails, analyzing up to batch_size of them per LLM request.
+
+    Args:
+        emails: Email data from the Gmail API.
+        batch_size: Maximum number of emails sent to the LLM in one request.
+        use_cache: Whether to reuse the analysis of identical emails.
+        skip_llm_for: Notification types that are classified from the subject
+            only, without the LLM analysis.
+
+    Returns:
+        List with an AirbnbNotification, or None if parsing failed, for each email
+        in the same order as ``emails``.
+    """
+    llm_results_list: List[Optional[Dict[str, Any]]] = [None] * len(emails)
+    subject_types = [_get_subject_only_type(email, skip_llm_for) for email in emails]
+
+    # Group emails whose prompts would be identical (the cache key covers every
+    # field sent to the LLM) so that each is analyzed once. Only emails without
+    # a cached analysis are sent to the LLM.
+    pending: Dict[str, List[int]] = {}
+    for i, email in enumerate(emails):
+        if subject_types[i] is not None:
+            llm_results_list[i] = {}
+            continue
+        key = _get_analyzer().cache_key(email)
+        cached = analysis_cache.get(key) if use_cache else None
+        if cached is not None:
+            llm_results_list[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+
+    groups = list(pending.values())
+    if len(groups) < sum(len(group) for group in groups):
+        logger.info("Analyzing {} distinct emails out of {}", len(groups), len(emails))
+
+    for start in range(0, len(groups), batch_size):
+        batch_groups = groups[start:start + batch_size]
+        batch = [emails[group[0]] for group in batch_groups]
+        logger.info("Parsing batch of {} emails", len(batch))
+
+        try:
+            batch_results = _get_analyzer().analyze_reservations_batch(
+                batch, use_cache=use_cache
+            )
+        except Exception as e:
+            logger.exception("Error analyzing email batch: {}", e)
+            continue
+
+        for group, group_results in zip(batch_groups, batch_results, strict=True):
+            for i in group:
+                llm_results_list[i] = group_results
+            if use_cache:
+                _cache_results(emails[group[0]], group_results)
+
+    notifications: List[Optional[AirbnbNotification]] = []
+    for email, llm_results, subject_type in zip(
+        emails, llm_results_list, subject_types, strict=True
+    ):
+        if llm_results is None:
+            notifications.append(None)
+            continue
+        try:
+            notifications.append(_build_notification(email, llm_results, subject_type))
+        except Exception as e:
+            logger.exception("Error parsing email: {}", e)
+            notifications.append(None)
+
+    return notifications
+
+
+def parse_emails_stream(
+    emails: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_cache: bool = True,
+    skip_llm_for: FrozenSet[NotificationType] = DEFAULT_SKIP_LLM_FOR,
+    include_html: bool = True,
+) -> Iterator[Optional[AirbnbNotification]]:
+    """Parse Airbnb emails lazily, one LLM batch at a time.
+
+    Only the batch being analyzed is held in memory, so callers can store each
+    notification and drop it before the next batch is read from ``emails``.
+
+    Args:
+        emails: Email data from the Gmail API, in any iterable.
+        batch_size: Maximum number of emails sent to the LLM in one request.
+        use_cache: Whether to reuse the analysis of identical emails.
+        skip_llm_for: Notification types that are classified from the subject
+            only, without the LLM analysis.
+        include_html: Whether to keep the HTML body in the notifications. The
+            HTML body is still used for the analysis either way.
+
+    Yields:
+        An AirbnbNotification, or None if parsing failed, for each email in
+        the same order as ``emails``.
+    """
+    emails = iter(emails)
+    while batch := list(islice(emails, batch_size)):
+        for notification in parse_emails(batch, batch_size, use_cache, skip_llm_for):
+            if notification is not None and not include_html:
+                notification = notification.model_copy(update={"raw_html": ""})
+            yield notification
+
+
+def parse_emails_parallel(
+    emails: List[Dict[str, Any]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    use_cache: bool = True,
+    skip_llm_for: FrozenSet[NotificationType] = DEFAULT_SKIP_LLM_FOR,
+) -> List[Optional[AirbnbNotification]]:
+    """Parse several Airbnb emails with concurrent LLM requests, one per email.
+
+    Args:
+        emails: Email data from the Gmail API.
+        max_workers: Maximum number of LLM requests in flight at once.
+        use_cache: Whether to reuse the analysis of identical emails.
+        skip_llm_for: Notification types that are classified from the subject
+            only, without the LLM analysis.
+
+    Returns:
+        List with an AirbnbNotification, or None if parsing failed, for each email
+        in the same order as ``emails``.
+    """
+    if not emails:
+        return []
+
+    subject_types = [_get_subject_only_type(email, skip_llm_for) for email in emails]
+    llm_results_list: List[Dict[str, Any]] = [{}] * len(emails)
+
+    pending = [i for i, subject_type in enumerate(subject_types) if subject_type is None]
+    if pending:
+        pending_results = _get_analyzer().analyze_reservations_concurrently(
+            [emails[i] for i in pending], max_workers, use_cache=use_cache
+        )
+        for i, llm_results in zip(pending, pending_results, strict=True):
+            llm_results_list[i] = llm_results
+
+    notifications: List[Optional[AirbnbNotification]] = []
+    for email, llm_results, subject_type in zip(
+        emails, llm_results_list, subject_types, strict=True
+    ):
+        try:
+            notifications.append(_build_notification(email, llm_results, subject_type))
+        except Exception as e:
+            logger.exception("Error parsing email: {}", e)
+            notifications.append(None)
+
+    return notifications
+
+
+def _get_subject_only_type(
+    email: Dict[str, Any], skip_llm_for: FrozenSet[NotificationType]
+) -> Optional[NotificationType]:
+    """Get the notification type of an email that does not need the LLM analysis.
+
+    Args:
+        email: Email data from the Gmail API.
+        skip_llm_for: Notification types that are classified from the subject only.
+
+    Returns:
+        The notification type identified from the subject if it is in
+        skip_llm_for, otherwise None.
+    """
+    if not skip_llm_for:
+        return None
+    notification_type = identify_notification_type_from_subject(email.get("subject", ""))
+    if notification_type in skip_llm_for:
+        logger.debug("Skipping LLM analysis for {} email", notification_type.value)
+        return notification_type
+    return None
+
+
+def _cache_results(email: Dict[str, Any], llm_results: Dict[str, Any]) -> None:
+    """Cache the LLM analysis of an email unless the analysis failed.
+
+    Args:
+        email: Email data from the Gmail API.
+        llm_results: Results from LLM analysis of the email.
+    """
+    if "error" not in llm_results:
+        analysis_cache.set(_get_analyzer().cache_key(email), llm_results)
+
+
+def _build_notification(
+    email: Dict[str, Any],
+    llm_results: Dict[str, Any],
+    notification_type: Optional[NotificationType] = None,
+) -> AirbnbNotification:
+    """Build a notification from an email and its LLM analysis results.
+
+    Args:
+        email: Email data from the Gmail API.
+        llm_results: Results from LLM analysis of the email.
+        notification_type: Notification type already identified from the
+            subject, or None to take it from the LLM analysis.
+
+    Returns:
+        AirbnbNotification object.
+    """
+    # Extract basic email metadata
+    email_id = email.get("id", "")
+    subject = email.get("subject", "")
+    body_text = email.get("body_text", "")
+
+    # Lazy so that the filtered copy is only built when debug logging is enabled
+    logger.opt(lazy=True).debug(
+        "LLM analysis results: {}",
+        lambda: {k: v for k, v in llm_results.items() if k != 'analysis'},
+    )
+
+    # Get notification type from LLM analysis
+    if notification_type is None:
         llm_notification_type = llm_results.get("notification_type", "unknown")
         notification_type = get_notification_type(llm_notification_type, subject)
 
-        # Create a datetime object from the LLM-parsed received date if available
-        received_at = get_received_datetime(llm_results, email)
-
-        # Create notification data with basic fields
-        notification_data = {
-            "notification_id": email_id,
-            "notification_type": notification_type,
-            "subject": subject,
-            "received_at": received_at,
-            "sender": email.get("from", ""),
-            "raw_text": body_text,
-            "raw_html": email.get("body_html", ""),
-
-            # Store the full LLM analysis
-            "llm_analysis": llm_results,
-            # Only store confidence from LLM
-            "llm_confidence": llm_results.get("confidence"),
-
-            # Set standard fields directly from LLM results
-            "check_in": llm_results.get("check_in_date"),
-            "check_out": llm_results.get("check_out_date"),
-            "guest_name": llm_results.get("guest_name"),
-            "property_name": llm_results.get("property_name"),
-        }
-
-        # Process number of guests
-        notification_data["num_guests"] = extract_num_guests(llm_results, body_text)
-
-        # Create and return the notification object
-        logger.info("Successfully parsed email into notification")
-        return AirbnbNotification(**notification_data)
+    # Create a datetime object from the LLM-parsed received date if available
+    received_at = get_received_datetime(llm_results, email)
+
+    # Create notification data with basic fields
+    notification_data = {
+        "notification_id": email_id,
+        "notification_type": notification_type,
+        "subject": subject,
+        "received_at": received_at,
+        "sender": email.get("from", ""),
+        "raw_text": body_text,
+        "raw_html": email.get("body_html", ""),
+
+        # Store the full LLM analysis
+        "llm_analysis": llm_results,
+        # Only store confidence from LLM
+        "llm_confidence": llm_results.get("confidence"),
+
+        # Set standard fields directly from LLM results
+        "check_in": llm_results.get("check_in_date"),
+        "check_out": llm_results.get("check_out_date"),
+        "guest_name": llm_results.get("guest_name"),
+        "property_name": llm_results.get("property_name"),
+
+        # Number of guests from LLM results, falling back to the email text
+        "num_guests": extract_num_guests(llm_results, body_text),
+    }
 
-    except Exception as e:
-        logger.exception("Error parsing email: {}", e)
-        return None
+    # Create and return the notification object
+    logger.info("Successfully parsed email into notification")
+    return AirbnbNotification(**notification_data)
 
 
 def get_notification_type(llm_type: str, subject: str) -> NotificationType:
@@ -91,12 +393,13 @@ def get_notification_type(llm_type: str, subject: str) -> NotificationType:
     Returns:
         NotificationType enum value
     """
-    try:
-        # Try to get from LLM first
-        return NotificationType[llm_type.upper()]
-    except (KeyError, AttributeError):
-        # Fallback to subject-based identification
-        return identify_notification_type_from_subject(subject)
+    # Try to get from LLM first
+    notification_type = _NT_BY_LOWER.get(llm_type.lower()) if isinstance(llm_type, str) else None
+    if notification_type is not None:
+        return notification_type
+
+    # Fallback to subject-based identification
+    return identify_notification_type_from_subject(subject)
 
 
 def get_received_datetime(llm_results: Dict[str, Any], email: Dict[str, Any]) -> Optional[datetime]:
@@ -113,7 +416,7 @@ def get_received_datetime(llm_results: Dict[str, Any], email: Dict[str, Any]) ->
 
     if llm_received_date:
         try:
-            return datetime.strptime(llm_received_date, "%Y-%m-%d")
+            return datetime.fromisoformat(llm_received_date)
         except (ValueError, TypeError):
             logger.warning("Failed to parse LLM received date: {}", llm_received_date)
 
@@ -131,26 +434,16 @@ def extract_num_guests(llm_results: Dict[str, Any], body_text: str) -> Optional[
     Returns:
         Integer number of guests or None
     """
-    if llm_results.get("num_guests") is not None:
+    num_guests = llm_results.get("num_guests")
+    if num_guests is not None:
         try:
-            return int(llm_results.get("num_guests"))
+            return int(num_guests)
         except (ValueError, TypeError):
-            logger.warning("Failed to parse LLM num_guests: {}", llm_results.get("num_guests"))
-
-    # Fallback to extracting from email text
-    if "guest" in body_text.lower():
-        for line in body_text.split("\n"):
-            if "guest" in line.lower():
-                # Try to get number of guests if mentioned
-                try:
-                    parts = line.split()
-                    for i, part in enumerate(parts):
-                        if part.isdigit() and i > 0 and "guest" in parts[i+1].lower():
-                            return int(part)
-                except (IndexError, ValueError):
-                    pass
+            logger.warning("Failed to parse LLM num_guests: {}", num_guests)
 
-    return None
+    # Fallback to extracting from email text ("2 guests")
+    match = _GUESTS_RE.search(body_text)
+    return int(match.group(1)) if match else None
 
 
 def identify_notification_type_from_subject(subject: str) -> NotificationType:
@@ -162,24 +455,18 @@ def identify_notification_type_from_subject(subject: str) -> NotificationType:
     Returns:
         NotificationType enum value.
     """
-    subject_lower = subject.lower()
+    subject_norm = _normalize_subject(subject)
 
     logger.debug("Identifying notification type from subject: {}", subject)
 
-    notification_keywords = {
-        NotificationType.BOOKING_REQUEST: ["booking request", "reservation request"],
-        NotificationType.BOOKING_CONFIRMATION: ["confirmed", "confirmation", "booked", "予約確定"],
-        NotificationType.CANCELLATION: ["cancelled", "canceled", "cancellation"],
-        NotificationType.MESSAGE: ["message", "sent you"],
-        NotificationType.REVIEW: ["review", "feedback"],
-        NotificationType.REMINDER: ["reminder", "checkout", "checkin"],
-        NotificationType.PAYMENT: ["payout", "payment"],
+    # Find every keyword in one pass; the highest priority type wins
+    matched_types = {
+        _KEYWORD_TYPES[match.group(1)] for match in _KEYWORD_RE.finditer(subject_norm)
     }
-
-    for notification_type, keywords in notification_keywords.items():
-        if any(keyword in subject_lower for keyword in keywords):
-            logger.debug("Identified notification type: {}", notification_type)
-            return notification_type
+    if matched_types:
+        notification_type = min(matched_types, key=_TYPE_PRIORITY.__getitem__)
+        logger.debug("Identified notification type: {}", notification_type)
+        return notification_type
 
     logger.debug("Could not identify notification type, defaulting to UNKNOWN")
     return NotificationType.UNKNOWN
@@ -199,54 +486,30 @@ def parse_email_date(date_str: str) -> Optional[datetime]:
 
     logger.debug("Parsing email date: {}", date_str)
 
-    # Common email date formats
-    date_formats = [
-        "%a, %d %b %Y %H:%M:%S %z",         # Mon, 14 Apr 2025 14:56:34 +0000
-        "%a, %d %b %Y %H:%M:%S %Z",         # Mon, 14 Apr 2025 14:56:34 UTC
-        "%a %d %b %Y %H:%M:%S %z",          # Mon 14 Apr 2025 14:56:34 +0000
-        "%a %d %b %Y %H:%M:%S %Z",          # Mon 14 Apr 2025 14:56:34 UTC
-        "%d %b %Y %H:%M:%S %z",             # 14 Apr 2025 14:56:34 +0000
-        "%d %b %Y %H:%M:%S %Z",             # 14 Apr 2025 14:56:34 UTC
-        "%a, %d %b %Y %H:%M:%S",            # Mon, 14 Apr 2025 14:56:34
-        "%Y-%m-%dT%H:%M:%S%z",              # 2025-04-14T14:56:34+0000
-        "%Y-%m-%d %H:%M:%S",                # 2025-04-14 14:56:34
-        "%Y-%m-%d",                         # 2025-04-14
-    ]
-
-    # Clean up the date string
-    date_str = date_str.replace("(UTC)", "UTC").replace("(GMT)", "GMT")
-
-    # Try each format
-    for date_format in date_formats:
+    # Pick the parser from the shape of the string instead of trying both
+    stripped = date_str.strip()
+    if stripped[:4].isdigit() and stripped[4:5] == "-":
+        # ISO 8601 dates and timestamps (2025-04-14, 2025-04-14T14:56:34+0000, ...)
         try:
-            return datetime.strptime(date_str, date_format)
+            return datetime.fromisoformat(stripped)
         except ValueError:
-            continue
+            pass
+    else:
+        # Most email Date headers are RFC 2822, which the email package parses directly
+        try:
+            return parsedate_to_datetime(stripped)
+        except (TypeError, ValueError, IndexError):
+            pass
 
     # Try extracting just the date part using regex
-    date_patterns = [
-        r'(\d{4}-\d{2}-\d{2})',                                           # 2025-04-14
-        r'(\d{1,2})\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{4})',  # 14 Apr 2025
-        r'(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)[a-z]*,?\s+(\d{1,2})\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{4})'  # Mon, 14 Apr 2025
-    ]
-
-    for pattern in date_patterns:
-        match = re.search(pattern, date_str)
-        if match:
-            try:
-                if len(match.groups()) == 1:
-                    # For YYYY-MM-DD format
-                    return datetime.strptime(match.group(1), "%Y-%m-%d")
-                elif len(match.groups()) == 2:
-                    # For patterns with day and year
-                    day = match.group(1)
-                    year = match.group(2)
-                    month_str = re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*', date_str).group(0)
-                    month_str = month_str[:3]  # Ensure we just get the first three letters
-                    date_part = f"{day} {month_str} {year}"
-                    return datetime.strptime(date_part, "%d %b %Y")
-            except (ValueError, AttributeError):
-                continue
+    for match in _DATE_PART_RE.finditer(date_str):
+        try:
+            if match.lastgroup == "iso":
+                return datetime.fromisoformat(match.group("iso"))
+            date_part = f"{match.group('day')} {match.group('month')} {match.group('year')}"
+            return datetime.strptime(date_part, "%d %b %Y")
+        except ValueError:
+            continue
 
     logger.warning("Could not parse date: {}", date_str)
     return None
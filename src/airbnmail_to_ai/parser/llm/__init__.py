@@ -1,5 +1,6 @@
 """LLM analysis for Airbnb emails."""
 
 from airbnmail_to_ai.parser.llm.analyzer import LLMAnalyzer
+from airbnmail_to_ai.parser.llm.cache import AnalysisCache
 
-__all__ = ["LLMAnalyzer"]
+__all__ = ["AnalysisCache", "LLMAnalyzer"]
@@ -1,26 +1,71 @@
 """LLM-based analyzer for Airbnb reservation emails."""
 
+import html
 import os
-from typing import Any, Dict, Optional
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import requests
-
-from airbnmail_to_ai.parser.llm.prompts import DEFAULT_SYSTEM_PROMPT
-from airbnmail_to_ai.parser.llm.response_parser import parse_llm_response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from airbnmail_to_ai.parser.llm.cache import AnalysisCache
+from airbnmail_to_ai.parser.llm.prompts import (
+    BATCH_PROMPT_SUFFIX,
+    DEFAULT_SYSTEM_PROMPT,
+    PROMPT_VERSION,
+    RESERVATION_TOOL,
+)
+from airbnmail_to_ai.parser.llm.response_parser import (
+    parse_llm_batch_response,
+    parse_llm_response,
+)
 from airbnmail_to_ai.utils.logging import get_logger
+from airbnmail_to_ai.utils.serialization import json_loads
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Patterns for reducing an HTML body to plain text in _clean_html
+_RE_HTML_SKIP = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_RE_HTML_TAG = re.compile(r"<[^>]+>")
+
+# Result returned without calling the API when no API key is configured. Like
+# failed analyses it has an "error" key, so that it is never cached.
+_NO_API_KEY_RESULT: Dict[str, Any] = {
+    "notification_type": "unknown",
+    "check_in_date": None,
+    "check_out_date": None,
+    "received_date": None,
+    "guest_name": None,
+    "num_guests": None,
+    "property_name": None,
+    "confidence": "low",
+    "analysis": "Not analyzed: no API key provided",
+    "error": "No API key provided",
+}
+
 
 class LLMAnalyzer:
     """Analyzer that uses Claude to extract information from Airbnb emails."""
 
+    # Connect and read timeouts for API requests, in seconds. The read timeout
+    # applies between streamed chunks, not to the whole response.
+    REQUEST_TIMEOUT = (3.05, 60.0)
+    # Longest time a stream may go without an event other than a keep-alive
+    # ping, in seconds. Pings reset the read timeout but carry no progress.
+    STREAM_IDLE_TIMEOUT = 30.0
+    # Default maximum length of the email summaries sent in one batched request
+    MAX_BATCH_CHARS = 40000
+
     def __init__(
         self,
         api_key: Optional[str] = None,
         api_url: str = "https://api.anthropic.com/v1/messages",
         model: str = "claude-3-7-sonnet-20250219",
+        cache: Optional[AnalysisCache] = None,
     ):
         """Initialize the LLM Analyzer.
 
@@ -28,23 +73,93 @@ class LLMAnalyzer:
             api_key: API key for Anthropic's Claude API
             api_url: URL for the Anthropic API endpoint
             model: Claude model name to use
+            cache: Cache of analysis results reused for identical emails, or None
+                to always call the API
         """
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         self.api_url = api_url
         self.model = model
+        self.cache = cache
+        self._session = self._create_session()
 
         logger.debug("Initialized LLM analyzer with model: {}", model)
         logger.debug("API URL: {}", api_url)
         logger.debug("API key provided: {}", bool(self.api_key))
+        if not self.api_key:
+            logger.warning("No API key provided, emails will not be analyzed")
+
+    def _create_session(self) -> requests.Session:
+        """Create the HTTP session used for all API requests.
+
+        The session keeps connections to the API alive between requests and
+        retries requests that were rejected as rate limited or overloaded.
+
+        Returns:
+            Configured requests session
+        """
+        session = requests.Session()
+        session.headers.update(
+            {
+                "x-api-key": self.api_key or "",
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json",
+                "accept": "text/event-stream",
+            }
+        )
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 529],
+            # POST is not retried by default; a rejected request was not processed
+            allowed_methods=frozenset({"POST"}),
+        )
+        session.mount(
+            "https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries)
+        )
+        return session
+
+    def close(self) -> None:
+        """Close the HTTP session and its pooled connections."""
+        self._session.close()
+
+    def __enter__(self) -> "LLMAnalyzer":
+        """Use the analyzer as a context manager that closes its session on exit."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the HTTP session."""
+        self.close()
+
+    def cache_key(self, email_data: Dict[str, Any]) -> str:
+        """Compute the cache key of an email's analysis with this analyzer.
+
+        The key covers the model and prompt version, so that results from a
+        different model or an older prompt are not reused.
+
+        Args:
+            email_data: Email data dictionary
+
+        Returns:
+            Cache key for AnalysisCache
+        """
+        return AnalysisCache.key(email_data, self.model, PROMPT_VERSION)
 
     def analyze_reservation(
-        self, email_data: Dict[str, Any], system_prompt: Optional[str] = None
+        self,
+        email_data: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """Analyze reservation email content using LLM.
 
+        Results for the default prompt are cached when the analyzer has a cache.
+        Failed analyses are not cached. Without an API key, a placeholder result
+        with no extracted data is returned.
+
         Args:
             email_data: Email data dictionary containing subject, date, from, body_text, etc.
             system_prompt: Custom system prompt to use (defaults to reservation analysis)
+            use_cache: Whether to read and update the cache
 
         Returns:
             Dictionary with analysis results, including:
@@ -53,8 +168,22 @@ class LLMAnalyzer:
             - check_out_date: Extracted check-out date (YYYY-MM-DD format)
             - received_date: Parsed received date (YYYY-MM-DD format)
             - confidence: Confidence level of the extraction (high, medium, low)
-            - analysis: Full analysis text from the LLM
+            - analysis: Explanation when the email could not be analyzed; the raw
+              LLM response is not kept
         """
+        if not self.api_key:
+            return dict(_NO_API_KEY_RESULT)
+
+        # Only results for the default prompt are cached
+        cache = self.cache if use_cache and not system_prompt else None
+        if cache is not None:
+            cached = cache.get(self.cache_key(email_data))
+            if cached is not None:
+                logger.debug(
+                    "Using cached LLM analysis for email: {}", email_data.get("subject", "")
+                )
+                return cached
+
         if not system_prompt:
             system_prompt = DEFAULT_SYSTEM_PROMPT
 
@@ -68,11 +197,15 @@ class LLMAnalyzer:
                 {"role": "user", "content": f"Extract information from this Airbnb email:\n\n{email_summary}"},
             ]
 
-            # Call LLM API or local model
-            result = self._call_llm_api(messages)
+            # Call LLM API, which answers with the input of the reservation tool
+            result = self._call_llm_api(messages, tool=RESERVATION_TOOL)
 
-            # Parse the response
-            return parse_llm_response(result)
+            # Parse the response. The raw text is the tool input, which holds
+            # nothing beyond the parsed fields, so it is not kept.
+            parsed = parse_llm_response(result, keep_analysis=False)
+            if cache is not None:
+                cache.set(self.cache_key(email_data), parsed)
+            return parsed
 
         except Exception as e:
             logger.exception("Error in LLM analysis: {}", e)
@@ -84,6 +217,157 @@ class LLMAnalyzer:
                 "error": str(e),
             }
 
+    def analyze_reservations_batch(
+        self,
+        emails: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_batch_chars: int = MAX_BATCH_CHARS,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Analyze several reservation emails with as few LLM requests as possible.
+
+        The emails are numbered in one prompt and the LLM is asked for a JSON
+        array with one result per email. Emails are grouped by the length of
+        their summaries so that no request exceeds ``max_batch_chars`` characters
+        of email content; an email longer than that is sent on its own. If a
+        response cannot be matched back to its emails, the group is split in half
+        and each half is retried, down to single emails analyzed with
+        analyze_reservation.
+
+        Args:
+            emails: List of email data dictionaries
+            system_prompt: Custom system prompt to use (defaults to reservation analysis)
+            max_batch_chars: Maximum total length of the email summaries in one request
+            use_cache: Whether emails analyzed on their own read and update the cache
+
+        Returns:
+            List of analysis result dictionaries, in the same order as ``emails``
+        """
+        if len(emails) <= 1 or not self.api_key:
+            # Nothing to batch, or no API to send the batch to
+            return [
+                self.analyze_reservation(email, system_prompt, use_cache) for email in emails
+            ]
+
+        summaries = [self._prepare_email_summary(email) for email in emails]
+        results: List[Dict[str, Any]] = [{}] * len(emails)
+        for group in self._group_by_length(summaries, max_batch_chars):
+            group_results = self._analyze_batch(
+                [emails[i] for i in group],
+                [summaries[i] for i in group],
+                system_prompt,
+                use_cache,
+            )
+            for i, result in zip(group, group_results, strict=True):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _group_by_length(summaries: List[str], max_chars: int) -> List[List[int]]:
+        """Group email summaries of similar length into batches.
+
+        Args:
+            summaries: Email summaries to group
+            max_chars: Maximum total length of a group, unless it has one summary
+
+        Returns:
+            Groups of indices into ``summaries``
+        """
+        groups: List[List[int]] = []
+        group: List[int] = []
+        group_chars = 0
+        for i in sorted(range(len(summaries)), key=lambda i: len(summaries[i])):
+            length = len(summaries[i])
+            if group and group_chars + length > max_chars:
+                groups.append(group)
+                group, group_chars = [], 0
+            group.append(i)
+            group_chars += length
+        if group:
+            groups.append(group)
+        return groups
+
+    def _analyze_batch(
+        self,
+        emails: List[Dict[str, Any]],
+        summaries: List[str],
+        system_prompt: Optional[str],
+        use_cache: bool,
+    ) -> List[Dict[str, Any]]:
+        """Analyze a group of emails with a single LLM request.
+
+        Args:
+            emails: List of email data dictionaries
+            summaries: Summaries of ``emails`` from _prepare_email_summary
+            system_prompt: Custom system prompt to use (defaults to reservation analysis)
+            use_cache: Whether an email analyzed on its own reads and updates the cache
+
+        Returns:
+            List of analysis result dictionaries, in the same order as ``emails``
+        """
+        if len(emails) == 1:
+            return [self.analyze_reservation(emails[0], system_prompt, use_cache)]
+
+        try:
+            email_summaries = "\n\n".join(
+                f"Email {i}:\n{summary}" for i, summary in enumerate(summaries, 1)
+            )
+            messages = [
+                {
+                    "role": "system",
+                    "content": (system_prompt or DEFAULT_SYSTEM_PROMPT) + BATCH_PROMPT_SUFFIX,
+                },
+                {
+                    "role": "user",
+                    "content": f"Extract information from these {len(emails)} Airbnb emails:"
+                    f"\n\n{email_summaries}",
+                },
+            ]
+
+            result = self._call_llm_api(messages, max_tokens=1000 * len(emails))
+            results = parse_llm_batch_response(result, len(emails), keep_analysis=False)
+            if results is not None:
+                return results
+
+        except Exception as e:
+            logger.warning("Batch LLM analysis of {} emails failed: {}", len(emails), e)
+
+        # Split the batch and retry each half
+        middle = len(emails) // 2
+        logger.info("Splitting batch of {} emails", len(emails))
+        return self._analyze_batch(
+            emails[:middle], summaries[:middle], system_prompt, use_cache
+        ) + self._analyze_batch(emails[middle:], summaries[middle:], system_prompt, use_cache)
+
+    def analyze_reservations_concurrently(
+        self,
+        emails: List[Dict[str, Any]],
+        max_workers: int = 8,
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Analyze several reservation emails with concurrent LLM requests, one per email.
+
+        The requests are I/O bound, so threads overlap their network latency.
+
+        Args:
+            emails: List of email data dictionaries
+            max_workers: Maximum number of requests in flight at once
+            system_prompt: Custom system prompt to use (defaults to reservation analysis)
+            use_cache: Whether to read and update the cache
+
+        Returns:
+            List of analysis result dictionaries, in the same order as ``emails``
+        """
+        def analyze(email: Dict[str, Any]) -> Dict[str, Any]:
+            return self.analyze_reservation(email, system_prompt, use_cache)
+
+        if len(emails) <= 1:
+            return [analyze(email) for email in emails]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(emails))) as executor:
+            return list(executor.map(analyze, emails))
+
     def _prepare_email_summary(self, email_data: Dict[str, Any]) -> str:
         """Prepare a comprehensive email summary with metadata for analysis.
 
@@ -93,42 +377,58 @@ class LLMAnalyzer:
         Returns:
             Formatted email summary string
         """
-        email_summary = f"Subject: {email_data.get('subject', '')}\n"
-        email_summary += f"Date: {email_data.get('date', '')}\n"
-        email_summary += f"From: {email_data.get('from', '')}\n"
-        email_summary += f"To: {email_data.get('to', '')}\n\n"
-        email_summary += f"Email Body:\n{email_data.get('body_text', '')}"
+        # Gmail only decodes the HTML body when there is no plain text part
+        body = email_data.get("body_text") or self._clean_html(email_data.get("body_html", ""))
+
+        return (
+            f"Subject: {email_data.get('subject', '')}\n"
+            f"Date: {email_data.get('date', '')}\n"
+            f"From: {email_data.get('from', '')}\n"
+            f"To: {email_data.get('to', '')}\n\n"
+            f"Email Body:\n{body}"
+        )
 
-        return email_summary
+    @staticmethod
+    def _clean_html(html_text: str) -> str:
+        """Reduce an HTML email body to its visible text.
 
-    def _call_llm_api(self, messages: list) -> str:
+        Args:
+            html_text: HTML body of the email
+
+        Returns:
+            Text with tags removed, entities decoded and whitespace collapsed
+        """
+        if "<" not in html_text and "&" not in html_text:
+            # No markup to remove, only whitespace to collapse
+            return " ".join(html_text.split())
+
+        text = _RE_HTML_SKIP.sub(" ", html_text)
+        text = _RE_HTML_TAG.sub(" ", text)
+        # Decode entities after removing tags so that "&lt;" is kept as text
+        text = html.unescape(text)
+        return " ".join(text.split())
+
+    def _call_llm_api(
+        self, messages: list, max_tokens: int = 1000, tool: Optional[Dict[str, Any]] = None
+    ) -> str:
         """Call the Anthropic Claude API with the given messages.
 
         Args:
             messages: List of message dictionaries for the LLM
+            max_tokens: Maximum number of tokens in the response
+            tool: Tool definition that Claude is required to call, or None for a
+                text response
 
         Returns:
-            Text response from Claude
+            Text response from Claude, or the JSON input of the tool call when a
+            tool is given
+
+        Raises:
+            RuntimeError: If no API key is configured
         """
-        # If no API key is provided, return a placeholder response for development/testing
         if not self.api_key:
-            logger.warning("No API key provided, using mock Claude response")
-            # Return a response that will ensure no dates are extracted
-            # and will parse correctly as JSON
-            return """
-            {
-              "notification_type": "unknown",
-              "check_in_date": null,
-              "check_out_date": null,
-              "received_date": null,
-              "guest_name": null,
-              "num_guests": null,
-              "property_name": null,
-              "confidence": "low"
-            }
-            """
+            raise RuntimeError("No API key provided for the Anthropic API")
 
-        # Only get to this code if we have an API key
         # Convert OpenAI-style messages format to Anthropic format
         system_content = ""
         user_content = ""
@@ -142,25 +442,74 @@ class LLMAnalyzer:
         # Make API request to Anthropic
         logger.debug("Calling Anthropic API with model: {}", self.model)
 
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json",
-        }
-
-        data = {
+        data: Dict[str, Any] = {
             "model": self.model,
             "system": system_content,
             "messages": [
                 {"role": "user", "content": user_content}
             ],
             "temperature": 0.1,  # Low temperature for more deterministic results
-            "max_tokens": 1000,
+            "max_tokens": max_tokens,
+            # Stream the response so it is consumed as it is generated
+            "stream": True,
         }
+        if tool is not None:
+            data["tools"] = [tool]
+            data["tool_choice"] = {"type": "tool", "name": tool["name"]}
 
-        response = requests.post(self.api_url, headers=headers, json=data)
+        response = self._session.post(
+            self.api_url, json=data, stream=True, timeout=self.REQUEST_TIMEOUT
+        )
         response.raise_for_status()
 
+        try:
+            text = self._read_stream(response)
+        finally:
+            response.close()
+
         logger.debug("Received response from Anthropic API")
 
-        return response.json()["content"][0]["text"]
+        return text
+
+    def _read_stream(self, response: requests.Response) -> str:
+        """Collect the text of a streamed Anthropic Messages API response.
+
+        Args:
+            response: Streaming HTTP response with server-sent events
+
+        Returns:
+            Text generated by Claude, including the JSON input of any tool call
+
+        Raises:
+            RuntimeError: If the stream reports an error
+            TimeoutError: If the stream makes no progress for STREAM_IDLE_TIMEOUT seconds
+        """
+        chunks = []
+        last_progress = time.monotonic()
+        for line in response.iter_lines():
+            # Only data lines carry events; skip event names and keep-alives
+            if not line.startswith(b"data:"):
+                continue
+
+            event = json_loads(line[5:])
+            event_type = event.get("type")
+            now = time.monotonic()
+            if event_type != "ping":
+                last_progress = now
+            elif now - last_progress > self.STREAM_IDLE_TIMEOUT:
+                raise TimeoutError(
+                    f"Anthropic API stream idle for more than {self.STREAM_IDLE_TIMEOUT} seconds"
+                )
+
+            if event_type == "content_block_delta":
+                delta = event["delta"]
+                if delta.get("type") == "text_delta":
+                    chunks.append(delta["text"])
+                elif delta.get("type") == "input_json_delta":
+                    chunks.append(delta["partial_json"])
+            elif event_type == "message_stop":
+                break
+            elif event_type == "error":
+                raise RuntimeError(f"Anthropic API stream error: {event.get('error')}")
+
+        return "".join(chunks)
@@ -0,0 +1,187 @@
+"""Cache for LLM analysis results keyed by email content."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from airbnmail_to_ai.utils.logging import get_logger
+from airbnmail_to_ai.utils.serialization import json_dumps, json_loads
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Default time-to-live of persisted results, in seconds
+DEFAULT_TTL = 86400
+
+
+class AnalysisCache:
+    """Two-level cache of LLM analysis results.
+
+    Results are kept in an in-memory LRU and, when a path is given, in a SQLite
+    file so that they survive across runs. Results expire after ``ttl`` seconds
+    in both layers.
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, path: Optional[str] = None, ttl: int = DEFAULT_TTL
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of results kept in memory.
+            path: Path to a SQLite file for persistent caching, or None for memory only.
+            ttl: Time-to-live of cached results, in seconds.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self.ttl = ttl
+        # Results with the time they were stored, least recently used first
+        self._memory: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def key(email: Dict[str, Any], *context: str) -> str:
+        """Compute the cache key of an email from the fields sent to the LLM.
+
+        These are the subject, date, sender, recipient and body. The body is the
+        plain text body, or the HTML body when there is no plain text, matching
+        the body that is sent to the LLM.
+
+        Args:
+            email: Email data dictionary.
+            *context: Further values the analysis depends on, such as the model
+                and prompt version.
+
+        Returns:
+            Hex digest identifying the email content.
+        """
+        body = email.get("body_text") or email.get("body_html", "")
+        content = "\0".join(
+            (
+                email.get("subject", ""),
+                email.get("date", ""),
+                email.get("from", ""),
+                email.get("to", ""),
+                body,
+                *context,
+            )
+        )
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result.
+
+        Args:
+            key: Cache key from AnalysisCache.key.
+
+        Returns:
+            A copy of the cached analysis result, or None on a miss.
+        """
+        with self._lock:
+            expires_before = time.time() - self.ttl
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if created_at > expires_before:
+                    self._memory.move_to_end(key)
+                    # Callers update results, which must not change the cached entry
+                    return dict(result)
+                del self._memory[key]
+
+            try:
+                conn = self._get_conn()
+                if conn is None:
+                    return None
+                row = conn.execute(
+                    "SELECT value, created_at FROM analysis_cache "
+                    "WHERE key = ? AND created_at > ?",
+                    (key, expires_before),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Error reading analysis cache: {}", e)
+                return None
+
+            if row is None:
+                return None
+
+            result = json_loads(row[0])
+            self._remember(key, result, row[1])
+            return dict(result)
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result in the cache.
+
+        Args:
+            key: Cache key from AnalysisCache.key.
+            result: The analysis result to cache.
+        """
+        with self._lock:
+            now = time.time()
+            self._remember(key, dict(result), now)
+
+            try:
+                conn = self._get_conn()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, value, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json_dumps(result), now),
+                )
+            except sqlite3.Error as e:
+                logger.warning("Error writing analysis cache: {}", e)
+
+    def clear(self) -> None:
+        """Remove all cached results from memory and from the persistent file."""
+        with self._lock:
+            self._memory.clear()
+            conn = self._get_conn()
+            if conn is not None:
+                conn.execute("DELETE FROM analysis_cache")
+
+    def _remember(self, key: str, result: Dict[str, Any], created_at: float) -> None:
+        """Store a result in the in-memory LRU. The caller must hold the lock."""
+        self._memory[key] = (created_at, result)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        """Get the SQLite connection, opening it on first use.
+
+        The caller must hold the lock.
+
+        Returns:
+            The connection, or None when the cache has no persistent file.
+        """
+        if self.path is None:
+            return None
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+
+
+def create_default_cache() -> AnalysisCache:
+    """Create a cache configured from the environment.
+
+    ANALYSIS_CACHE_PATH enables the persistent layer and ANALYSIS_CACHE_TTL sets
+    the time-to-live of results in seconds.
+
+    Returns:
+        AnalysisCache instance.
+    """
+    return AnalysisCache(
+        path=os.environ.get("ANALYSIS_CACHE_PATH"),
+        ttl=int(os.environ.get("ANALYSIS_CACHE_TTL", DEFAULT_TTL)),
+    )
@@ -1,55 +1,141 @@
 """Date utility functions for the LLM analyzer."""
 
+import re
+from calendar import monthrange
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 
+# Japanese date pattern (2023年4月15日 -> 2023-04-15)
+_JP_DATE_RE = re.compile(r"(\d{4})年\s*(\d{1,2})月\s*(\d{1,2})日")
 
+# Numeric dates with slashes (15/04/2023 or 04/15/2023), parsed as integers
+_SLASH_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+# Shapes of the date strings understood by normalize_date, each with the
+# formats to try for it, so that only formats that can match are attempted
+_DATE_SHAPES = (
+    (re.compile(r"\d{4}-\d{1,2}-\d{1,2}"), ("%Y-%m-%d",)),  # 2023-04-15
+    (
+        re.compile(r"\d{1,2}\s+[A-Za-z]+\s+\d{4}"),
+        (
+            "%d %B %Y",  # 15 April 2023
+            "%d %b %Y",  # 15 Apr 2023
+        ),
+    ),
+    (
+        re.compile(r"[A-Za-z]+\s+\d{1,2},\s+\d{4}"),
+        (
+            "%B %d, %Y",  # April 15, 2023
+            "%b %d, %Y",  # Apr 15, 2023
+        ),
+    ),
+    (re.compile(r"[A-Za-z]+\s+\d{1,2}\s+\d{4}"), ("%B %d %Y",)),  # April 15 2023
+)
+
+
+def _is_iso_date(date_str: str) -> bool:
+    """Check whether a string has the YYYY-MM-DD shape.
+
+    Args:
+        date_str: Date string
+
+    Returns:
+        True if the string is four digits, two digits and two digits separated by dashes
+    """
+    return (
+        len(date_str) == 10
+        and date_str[4] == "-"
+        and date_str[7] == "-"
+        and date_str[:4].isdigit()
+        and date_str[5:7].isdigit()
+        and date_str[8:].isdigit()
+    )
+
+
+@lru_cache(maxsize=8192)
 def normalize_date(date_str: str) -> str:
     """Normalize date string to YYYY-MM-DD format.
 
+    The same dates recur across emails and responses, so results are cached.
+
     Args:
         date_str: Date string in various possible formats
 
     Returns:
         Date string in YYYY-MM-DD format, or original string if parsing fails
     """
-    try:
-        # Try various date formats
-        formats = [
-            "%Y-%m-%d",  # 2023-04-15
-            "%d/%m/%Y",  # 15/04/2023
-            "%m/%d/%Y",  # 04/15/2023
-            "%d %B %Y",  # 15 April 2023
-            "%B %d, %Y",  # April 15, 2023
-            "%B %d %Y",  # April 15 2023
-            "%d %b %Y",  # 15 Apr 2023
-            "%b %d, %Y",  # Apr 15, 2023
-        ]
+    # Already in YYYY-MM-DD format. Invalid dates such as 2023-02-30 would fail
+    # to parse and be returned unchanged anyway.
+    if _is_iso_date(date_str):
+        return date_str
 
+    try:
         # Japanese date pattern (2023年4月15日 -> 2023-04-15)
-        import re
-        jp_date_pattern = r"(\d{4})年\s*(\d{1,2})月\s*(\d{1,2})日"
-        jp_match = re.search(jp_date_pattern, date_str)
+        jp_match = _JP_DATE_RE.search(date_str) if "年" in date_str else None
         if jp_match:
             year = jp_match.group(1)
             month = jp_match.group(2).zfill(2)  # Pad single-digit month (4 -> 04)
             day = jp_match.group(3).zfill(2)    # Pad single-digit day (5 -> 05)
             return f"{year}-{month}-{day}"
 
-        # Try standard formats
-        for date_format in formats:
-            try:
-                dt = datetime.strptime(date_str, date_format)
-                return dt.strftime("%Y-%m-%d")
-            except ValueError:
-                continue
+        slash_match = _SLASH_DATE_RE.fullmatch(date_str)
+        if slash_match:
+            return _parse_slash_date(*map(int, slash_match.groups())) or date_str
 
-        # If all formats failed, return the original string
-        return date_str
+        # Try standard formats; if all of them fail, return the original string
+        return _parse_with_formats(date_str) or date_str
 
     except Exception:
         return date_str
 
 
+def _parse_slash_date(first: int, second: int, year: int) -> Optional[str]:
+    """Build a date from the numbers of a slash-separated date.
+
+    Day first (15/04/2023) is preferred over month first (04/15/2023), as with
+    the "%d/%m/%Y" and "%m/%d/%Y" formats, but without strptime or exceptions.
+
+    Args:
+        first: First number of the date
+        second: Second number of the date
+        year: Four-digit year
+
+    Returns:
+        Date string in YYYY-MM-DD format, or None if neither order is a valid date
+    """
+    if year < 1:
+        return None
+    for day, month in ((first, second), (second, first)):
+        if 1 <= month <= 12 and 1 <= day <= monthrange(year, month)[1]:
+            return f"{year:04d}-{month:02d}-{day:02d}"
+    return None
+
+
+def _parse_with_formats(date_str: str) -> Optional[str]:
+    """Parse a date string with the first matching standard format.
+
+    Only the formats for the shape of the string are tried.
+
+    Args:
+        date_str: Date string in one of the standard formats
+
+    Returns:
+        Date string in YYYY-MM-DD format, or None if no format matches
+    """
+    for shape, date_formats in _DATE_SHAPES:
+        if not shape.fullmatch(date_str):
+            continue
+        for date_format in date_formats:
+            try:
+                return datetime.strptime(date_str, date_format).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        # The shapes do not overlap, so no other format can match
+        break
+    return None
+
+
 def validate_date_pair(check_in: str, check_out: str) -> tuple[str, str]:
     """Validate check-in and check-out dates and ensure proper order.
 
@@ -60,15 +146,13 @@ def validate_date_pair(check_in: str, check_out: str) -> tuple[str, str]:
     Returns:
         Tuple of (check_in, check_out) dates with proper ordering
     """
-    try:
-        in_date = datetime.strptime(check_in, "%Y-%m-%d")
-        out_date = datetime.strptime(check_out, "%Y-%m-%d")
+    # Fixed-width YYYY-MM-DD strings sort in date order, so no parsing is needed
+    if not (_is_iso_date(check_in) and _is_iso_date(check_out)):
+        # If dates aren't in YYYY-MM-DD format, return as-is
+        return check_in, check_out
 
-        # Make sure check-out is after check-in
-        if out_date <= in_date:
-            return check_out, check_in  # Swap if in wrong order
+    # Make sure check-out is after check-in
+    if check_out <= check_in:
+        return check_out, check_in  # Swap if in wrong order
 
-        return check_in, check_out
-    except ValueError:
-        # If dates can't be parsed, return as-is
-        return check_in, check_out
+    return check_in, check_out
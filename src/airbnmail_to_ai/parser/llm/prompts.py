@@ -1,5 +1,9 @@
 """System prompts for LLM analysis of Airbnb emails."""
 
+# Version of the prompts and tool schema below. It is part of the cache key of
+# analysis results, so bump it whenever they change to invalidate old results.
+PROMPT_VERSION = "1"
+
 # Default system prompt for reservation analysis
 DEFAULT_SYSTEM_PROMPT = """
 あなたは日本語とEnglishのAirbnb予約メールを分析する専門AIアシスタントです。
@@ -52,3 +56,50 @@ DEFAULT_SYSTEM_PROMPT = """
 }
 ```
 """
+
+# Appended to the system prompt when several emails are analyzed in one request
+BATCH_PROMPT_SUFFIX = """
+複数のメールが「Email 1:」「Email 2:」のように番号付きで与えられる場合は、
+各メールについて上記と同じ形式のJSONオブジェクトを作成し、
+メールと同じ順序・同じ件数のJSON配列として出力してください：
+
+```json
+[
+  {"notification_type": "booking_confirmation", "check_in_date": "2025-04-15", ...},
+  {"notification_type": "message", "check_in_date": null, ...}
+]
+```
+"""
+
+# Tool that Claude is made to call with the extracted fields, so that the
+# response is a JSON object matching this schema rather than free-form text
+RESERVATION_TOOL = {
+    "name": "record_reservation",
+    "description": "Record the information extracted from an Airbnb email.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "notification_type": {
+                "type": "string",
+                "enum": [
+                    "booking_request",
+                    "booking_confirmation",
+                    "cancellation",
+                    "message",
+                    "review",
+                    "reminder",
+                    "payment",
+                    "unknown",
+                ],
+            },
+            "check_in_date": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+            "check_out_date": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+            "received_date": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+            "guest_name": {"type": ["string", "null"]},
+            "num_guests": {"type": ["integer", "null"]},
+            "property_name": {"type": ["string", "null"]},
+            "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        },
+        "required": ["notification_type", "check_in_date", "check_out_date", "confidence"],
+    },
+}
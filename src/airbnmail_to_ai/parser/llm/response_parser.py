@@ -2,14 +2,166 @@
 
 import json
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Pattern, Tuple, Type, TypeVar
 
 from airbnmail_to_ai.parser.llm.date_utils import normalize_date, validate_date_pair
 from airbnmail_to_ai.utils.logging import get_logger
+from airbnmail_to_ai.utils.serialization import JSONDecodeError, json_dumps, json_loads
 
 # Initialize logger
 logger = get_logger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+
+# Type of the JSON value expected by _extract_json
+_T = TypeVar("_T")
+
+# Keywords for each notification type, in priority order
+_NOTIFICATION_TYPES = {
+    "booking_request": ("booking request", "reservation request"),
+    "booking_confirmation": ("booking confirmation", "reservation confirmation", "confirmed", "booked"),
+    "cancellation": ("cancelled", "canceled", "cancellation"),
+    "message": ("message", "sent you"),
+    "review": ("review", "feedback"),
+    "reminder": ("reminder", "checkout", "checkin"),
+    "payment": ("payout", "payment"),
+}
+_NOTIFICATION_TYPE_NAMES = tuple(_NOTIFICATION_TYPES)
+# Zero-width lookahead so that overlapping keywords are all found in one scan.
+# Each type has one group, so the group number of a match identifies its type
+# without lowering the matched text.
+_NOTIFY_RE = re.compile(
+    "(?="
+    + "|".join(
+        "(" + "|".join(re.escape(keyword) for keyword in keywords) + ")"
+        for keywords in _NOTIFICATION_TYPES.values()
+    )
+    + ")",
+    re.IGNORECASE,
+)
+
+# Hiragana, katakana (including ー) and kanji, for Japanese names. The re
+# module has no \p{Script=...} classes.
+_JA = r"\u3005\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF"
+
+# All dates in ISO format
+_ISO_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+
+# Dates on the same line as a check-in, check-out or received date label,
+# found for all three fields in one scan
+_DATES_RE = re.compile(
+    r"check[ -]?in[^0-9\n]{0,40}(?P<check_in>\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})"
+    r"|check[ -]?out[^0-9\n]{0,40}(?P<check_out>\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})"
+    r"|(?:received|email) date[^0-9\n]{0,40}(?P<received>\d{4}-\d{2}-\d{2})",
+    re.IGNORECASE,
+)
+
+# Patterns tried in order for dates not found by _DATES_RE
+_RECEIVED_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"received date.*?(\d{4}-\d{2}-\d{2})",
+        r"email date.*?(\d{4}-\d{2}-\d{2})",
+        r"date.*?(\d{4}-\d{2}-\d{2})",
+    )
+)
+
+_CHECK_IN_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"check[ -]?in date.*?(\d{4}-\d{2}-\d{2})",
+        r"check[ -]?in.*?(\d{4}-\d{2}-\d{2})",
+        r"check[ -]?in.*?(\d{1,2}/\d{1,2}/\d{4})",
+        r"check[ -]?in.*?(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
+        r"(\d{4}-\d{2}-\d{2}).*?check[ -]?in",
+    )
+)
+
+_CHECK_OUT_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"check[ -]?out date.*?(\d{4}-\d{2}-\d{2})",
+        r"check[ -]?out.*?(\d{4}-\d{2}-\d{2})",
+        r"check[ -]?out.*?(\d{1,2}/\d{1,2}/\d{4})",
+        r"check[ -]?out.*?(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
+        r"(\d{4}-\d{2}-\d{2}).*?check[ -]?out",
+    )
+)
+
+_GUEST_NAME_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        # English patterns
+        r"guest name.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
+        r"guest.*?name.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
+        r"guest:?\s+([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
+        r"name of guest.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
+        # Japanese patterns
+        rf"ゲスト名:?\s*([{_JA}A-Za-z]+(?:[ \t\u3000]+[{_JA}A-Za-z]+)*)",
+        rf"お客様:?\s*([{_JA}A-Za-z]+(?:[ \t\u3000]+[{_JA}A-Za-z]+)*)",
+        rf"予約者:?\s*([{_JA}A-Za-z]+(?:[ \t\u3000]+[{_JA}A-Za-z]+)*)",
+    )
+)
+
+# Patterns for the number of guests in priority order, with <num> marking the number
+_NUM_GUESTS_PATTERNS = (
+    # English patterns
+    r"number of guests:?\s*<num>",
+    r"guests:?\s*<num>",
+    r"<num>\s+guests?",
+    r"guests?:?\s*<num>",
+    r"party of\s*<num>",
+    r"<num>\s+people",
+    r"<num>\s+persons?",
+    # Japanese patterns
+    r"ゲスト人数\s*(?:大人)?<num>(?:人|名)",
+    r"大人<num>(?:人|名)",
+    r"成人<num>(?:人|名)",
+    r"<num>(?:人|名)(?:の大人|のゲスト)?",
+    # Direct from LLM output format
+    r"num_guests:?\s*<num>",
+)
+# All of them in one lookahead alternation, so that every position reports its
+# highest priority match in a single scan. Each pattern has exactly one group,
+# so the group number of a match is its pattern's priority.
+_NUM_GUESTS_RE = re.compile(
+    "(?=(?:"
+    + "|".join(pattern.replace("<num>", r"(\d+)") for pattern in _NUM_GUESTS_PATTERNS)
+    + "))",
+    re.IGNORECASE,
+)
+
+# The name runs to the end of its line. Negated classes rather than lazy
+# quantifiers keep each attempt linear on long single-line responses.
+_PROPERTY_NAME_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        # English patterns
+        r"property name[^A-Za-z0-9\n]*([A-Za-z0-9][^\n]*)",
+        r"property:?\s+([A-Za-z0-9][^\n]*)",
+        r"listing:?\s+([A-Za-z0-9][^\n]*)",
+        r"name of property[^A-Za-z0-9\n]*([A-Za-z0-9][^\n]*)",
+        r"booked:?\s+([A-Za-z0-9][^\n]*)",
+        # Japanese patterns
+        rf"物件名:?\s*([{_JA}A-Za-z0-9][^\n]*)",
+        rf"宿泊先:?\s*([{_JA}A-Za-z0-9][^\n]*)",
+        rf"リスティング:?\s*([{_JA}A-Za-z0-9][^\n]*)",
+    )
+)
+
+# Default values of a result parsed from a non-JSON response. As for JSON
+# responses, "analysis" is only added when the raw response is kept.
+_RESULT_TEMPLATE: Dict[str, Any] = {
+    "notification_type": "unknown",
+    "check_in_date": None,
+    "check_out_date": None,
+    "received_date": None,
+    "guest_name": None,
+    "num_guests": None,
+    "property_name": None,
+    "confidence": "low",
+}
+
 
 def extract_json_from_response(response_text: str) -> Optional[Dict[str, Any]]:
     """Extract JSON from LLM response text.
@@ -18,28 +170,130 @@ def extract_json_from_response(response_text: str) -> Optional[Dict[str, Any]]:
         response_text: Raw text response from the LLM
 
     Returns:
-        Dictionary parsed from JSON or None if parsing fails
+        Dictionary parsed from JSON or None if the response has no JSON object
+    """
+    return _extract_json(response_text, dict)
+
+
+def _extract_json(response_text: str, expected_type: Type[_T]) -> Optional[_T]:
+    """Extract a JSON object or array of the expected type from LLM response text.
+
+    Args:
+        response_text: Raw text response from the LLM
+        expected_type: dict for a JSON object, or list for a JSON array
+
+    Returns:
+        The parsed value, or None if the response has no JSON value of that type
     """
     try:
         # Extract the JSON part if enclosed in ```json ... ``` or similar
-        json_match = re.search(r'```(?:json)?\s*(.*?)\s*```', response_text, re.DOTALL)
+        fenced = _find_fenced_block(response_text)
 
-        if json_match:
-            json_str = json_match.group(1)
-            return json.loads(json_str)
+        if fenced is not None:
+            value = json_loads(fenced)
         else:
             # If no code block markers, try parsing the entire response as JSON
-            return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        logger.warning(f"Failed to parse JSON response: {e}")
+            value = json_loads(response_text)
+        if isinstance(value, expected_type):
+            return value
+    except JSONDecodeError as e:
+        logger.debug("Response is not plain JSON: {}", e)
+
+    embedded = _find_embedded_json(response_text, expected_type)
+    if embedded is None:
+        kind = "object" if expected_type is dict else "array"
+        logger.warning("Failed to find a JSON {} in the response", kind)
+    return embedded
+
+
+def _find_fenced_block(text: str) -> Optional[str]:
+    """Get the contents of the first ``` code block, without a json language tag.
+
+    Args:
+        text: Text that may contain a code block
+
+    Returns:
+        The stripped block contents, or None if there is no closed code block
+    """
+    start = text.find("```")
+    if start < 0:
+        return None
+    end = text.find("```", start + 3)
+    if end < 0:
+        return None
+
+    block = text[start + 3 : end]
+    if block.startswith("json"):
+        block = block[4:]
+    return block.strip()
+
+
+def _find_embedded_json(text: str, expected_type: Type[_T]) -> Optional[_T]:
+    """Parse the first JSON object or array embedded in surrounding text.
+
+    The decoder reads one value from each opening bracket in turn and ignores
+    whatever follows it, so no regex backtracking over the text is needed.
+
+    Args:
+        text: Text that may contain a JSON value, e.g. after an introduction
+        expected_type: dict for a JSON object, or list for a JSON array
+
+    Returns:
+        The first parsed value of the expected type, or None if there is none
+    """
+    opening = "{" if expected_type is dict else "["
+    start = text.find(opening)
+    while start >= 0:
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, start)
+        except JSONDecodeError:
+            end = start + 1
+        else:
+            if isinstance(value, expected_type):
+                return value
+        start = text.find(opening, end)
+    return None
+
+
+def parse_llm_batch_response(
+    llm_response: str, expected_count: int, keep_analysis: bool = True
+) -> Optional[List[Dict[str, Any]]]:
+    """Parse an LLM response to a batched request into one result per email.
+
+    Args:
+        llm_response: Raw text response from the LLM, expected to be a JSON array
+        expected_count: Number of emails that were sent in the request
+        keep_analysis: Whether to keep each email's own result, serialized, as
+            "analysis" in that result
+
+    Returns:
+        List of result dictionaries in request order, or None if the response is
+        not a JSON array of objects with one entry per email
+    """
+    parsed_json = _extract_json(llm_response, list)
+    if (
+        parsed_json is None
+        or len(parsed_json) != expected_count
+        or not all(isinstance(item, dict) for item in parsed_json)
+    ):
+        logger.warning("Batch response does not contain {} results", expected_count)
         return None
 
+    if keep_analysis:
+        for item in parsed_json:
+            # Keep each email's own result as its raw analysis
+            item["analysis"] = json_dumps(item)
+    return parsed_json
 
-def parse_llm_response(llm_response: str) -> Dict[str, Any]:
+
+def parse_llm_response(llm_response: str, keep_analysis: bool = True) -> Dict[str, Any]:
     """Parse the LLM response to extract structured data.
 
     Args:
         llm_response: Raw text response from the LLM
+        keep_analysis: Whether to keep the raw response as "analysis" in the
+            result. Callers that hold many results and never read it can pass
+            False so that the response text is not retained.
 
     Returns:
         Dictionary with structured data extracted from the response
@@ -48,22 +302,15 @@ def parse_llm_response(llm_response: str) -> Dict[str, Any]:
     parsed_json = extract_json_from_response(llm_response)
     if parsed_json:
         # Add the raw analysis
-        parsed_json["analysis"] = llm_response
+        if keep_analysis:
+            parsed_json["analysis"] = llm_response
         return parsed_json
 
     # Initialize result with default values if JSON parsing failed
     logger.info("JSON parsing failed, falling back to regex parsing")
-    result = {
-        "notification_type": "unknown",
-        "check_in_date": None,
-        "check_out_date": None,
-        "received_date": None,
-        "guest_name": None,
-        "num_guests": None,
-        "property_name": None,
-        "confidence": "low",
-        "analysis": llm_response,
-    }
+    result = _RESULT_TEMPLATE.copy()
+    if keep_analysis:
+        result["analysis"] = llm_response
 
     try:
         # Extract notification type
@@ -97,20 +344,17 @@ def extract_notification_type(llm_response: str, result: Dict[str, Any]) -> None
         llm_response: Raw text response from the LLM
         result: Result dictionary to update
     """
-    notification_types = {
-        "booking_request": ["booking request", "reservation request"],
-        "booking_confirmation": ["booking confirmation", "reservation confirmation", "confirmed", "booked"],
-        "cancellation": ["cancelled", "canceled", "cancellation"],
-        "message": ["message", "sent you"],
-        "review": ["review", "feedback"],
-        "reminder": ["reminder", "checkout", "checkin"],
-        "payment": ["payout", "payment"],
-    }
-
-    for notification_type, keywords in notification_types.items():
-        if any(keyword.lower() in llm_response.lower() for keyword in keywords):
-            result["notification_type"] = notification_type
-            break
+    # Find every keyword in one pass; the highest priority type wins
+    priority = min(
+        (
+            match.lastindex
+            for match in _NOTIFY_RE.finditer(llm_response)
+            if match.lastindex is not None
+        ),
+        default=None,
+    )
+    if priority is not None:
+        result["notification_type"] = _NOTIFICATION_TYPE_NAMES[priority - 1]
 
 
 def extract_dates(llm_response: str, result: Dict[str, Any]) -> None:
@@ -120,61 +364,59 @@ def extract_dates(llm_response: str, result: Dict[str, Any]) -> None:
         llm_response: Raw text response from the LLM
         result: Result dictionary to update
     """
-    # Find all dates in common formats
-    date_pattern = r"\b(\d{4}-\d{2}-\d{2})\b"
-    dates = re.findall(date_pattern, llm_response)
+    # Labelled dates in one pass; the first date for each label wins
+    found: Dict[str, str] = {}
+    for match in _DATES_RE.finditer(llm_response):
+        label = match.lastgroup
+        if label is None:
+            continue
+        found.setdefault(label, match.group(label))
+        if len(found) == 3:
+            break
 
     # Look for received date
-    received_patterns = [
-        r"received date.*?(\d{4}-\d{2}-\d{2})",
-        r"email date.*?(\d{4}-\d{2}-\d{2})",
-        r"date.*?(\d{4}-\d{2}-\d{2})",
-    ]
+    received_date = found.get("received") or _search_first(_RECEIVED_PATTERNS, llm_response)
+    if received_date:
+        result["received_date"] = received_date
 
-    for pattern in received_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
-        if match:
-            result["received_date"] = match.group(1)
-            break
+    # Try to find check-in date
+    check_in = found.get("check_in") or _search_first(_CHECK_IN_PATTERNS, llm_response)
+    if check_in:
+        result["check_in_date"] = normalize_date(check_in)
+        result["confidence"] = "high"
 
-    # Try to find "check-in" and "check-out" keywords near dates
-    check_in_patterns = [
-        r"check[ -]?in date.*?(\d{4}-\d{2}-\d{2})",
-        r"check[ -]?in.*?(\d{4}-\d{2}-\d{2})",
-        r"check[ -]?in.*?(\d{1,2}/\d{1,2}/\d{4})",
-        r"check[ -]?in.*?(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
-        r"(\d{4}-\d{2}-\d{2}).*?check[ -]?in",
-    ]
+    # Try to find check-out date
+    check_out = found.get("check_out") or _search_first(_CHECK_OUT_PATTERNS, llm_response)
+    if check_out:
+        result["check_out_date"] = normalize_date(check_out)
+        result["confidence"] = "high"
 
-    check_out_patterns = [
-        r"check[ -]?out date.*?(\d{4}-\d{2}-\d{2})",
-        r"check[ -]?out.*?(\d{4}-\d{2}-\d{2})",
-        r"check[ -]?out.*?(\d{1,2}/\d{1,2}/\d{4})",
-        r"check[ -]?out.*?(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
-        r"(\d{4}-\d{2}-\d{2}).*?check[ -]?out",
-    ]
+    # If specific check-in/check-out dates not found, use the first two ISO dates
+    # in order; only those two are ever scanned for
+    if not result["check_in_date"] or not result["check_out_date"]:
+        dates = _ISO_DATE_RE.finditer(llm_response)
+        first, second = next(dates, None), next(dates, None)
+        if first is not None and second is not None:
+            result["check_in_date"] = first.group(1)
+            result["check_out_date"] = second.group(1)
+            result["confidence"] = "medium"
 
-    # Try to find check-in date
-    for pattern in check_in_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
-        if match:
-            result["check_in_date"] = normalize_date(match.group(1))
-            result["confidence"] = "high"
-            break
 
-    # Try to find check-out date
-    for pattern in check_out_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
-        if match:
-            result["check_out_date"] = normalize_date(match.group(1))
-            result["confidence"] = "high"
-            break
+def _search_first(patterns: Tuple[Pattern[str], ...], text: str) -> Optional[str]:
+    """Search text with each pattern in turn.
 
-    # If specific check-in/check-out dates not found but we have dates, use them in order
-    if (not result["check_in_date"] or not result["check_out_date"]) and len(dates) >= 2:
-        result["check_in_date"] = dates[0]
-        result["check_out_date"] = dates[1]
-        result["confidence"] = "medium"
+    Args:
+        patterns: Compiled patterns with the value in their first group
+        text: Text to search
+
+    Returns:
+        First group of the first pattern that matches, or None if none match
+    """
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
 
 
 def extract_guest_info(llm_response: str, result: Dict[str, Any]) -> None:
@@ -185,58 +427,21 @@ def extract_guest_info(llm_response: str, result: Dict[str, Any]) -> None:
         result: Result dictionary to update
     """
     # Look for guest name
-    guest_name_patterns = [
-        # English patterns
-        r"guest name.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
-        r"guest.*?name.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
-        r"guest:?\s+([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
-        r"name of guest.*?([A-Z][a-z]+(?: [A-Z][a-z]+)+)",
-        # Japanese patterns
-        r"ゲスト名:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+(?:\s+[\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+)*)",
-        r"お客様:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+(?:\s+[\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+)*)",
-        r"予約者:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+(?:\s+[\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z]+)*)",
-    ]
-
-    for pattern in guest_name_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
+    for pattern in _GUEST_NAME_PATTERNS:
+        match = pattern.search(llm_response)
         if match:
             result["guest_name"] = match.group(1).strip()
             break
 
-    # Look for number of guests
-    num_guests_patterns = [
-        # English patterns
-        r"number of guests:?\s*(\d+)",
-        r"guests:?\s*(\d+)",
-        r"(\d+)\s+guest(s)?",
-        r"guest(s)?:?\s*(\d+)",
-        r"party of\s*(\d+)",
-        r"(\d+)\s+people",
-        r"(\d+)\s+person(s)?",
-        # Japanese patterns
-        r"ゲスト人数\s*(?:大人)?(\d+)(?:人|名)",
-        r"大人(\d+)(?:人|名)",
-        r"成人(\d+)(?:人|名)",
-        r"(\d+)(?:人|名)(?:の大人|のゲスト)?",
-        # Direct from LLM output format
-        r"num_guests:?\s*(\d+)",
-    ]
-
-    for pattern in num_guests_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
-        if match:
-            # For the patterns where the number is in the second capturing group
-            if pattern == r"guest(s)?:?\s*(\d+)" or pattern == r"person(s)?:?\s*(\d+)":
-                result["num_guests"] = int(match.group(2))
-            else:
-                # For all other patterns, the number is in the first capturing group
-                result["num_guests"] = int(match.group(1))
-            break
-
-    # Direct extraction from LLM response for number of guests
-    num_guests_direct = re.search(r"Number of guests:?\s*(\d+)", llm_response, re.IGNORECASE)
-    if num_guests_direct and result["num_guests"] is None:
-        result["num_guests"] = int(num_guests_direct.group(1))
+    # Look for number of guests; the highest priority pattern wins, and its
+    # leftmost match among equals
+    best: Optional[Tuple[int, str]] = None
+    for match in _NUM_GUESTS_RE.finditer(llm_response):
+        index = match.lastindex
+        if index is not None and (best is None or index < best[0]):
+            best = (index, match.group(index))
+    if best is not None:
+        result["num_guests"] = int(best[1])
 
 
 def extract_property_info(llm_response: str, result: Dict[str, Any]) -> None:
@@ -247,21 +452,8 @@ def extract_property_info(llm_response: str, result: Dict[str, Any]) -> None:
         result: Result dictionary to update
     """
     # Look for property name
-    property_name_patterns = [
-        # English patterns
-        r"property name.*?([A-Za-z0-9].*?)(?:\n|$)",
-        r"property:?\s+([A-Za-z0-9].*?)(?:\n|$)",
-        r"listing:?\s+([A-Za-z0-9].*?)(?:\n|$)",
-        r"name of property.*?([A-Za-z0-9].*?)(?:\n|$)",
-        r"booked:?\s+([A-Za-z0-9].*?)(?:\n|$)",
-        # Japanese patterns
-        r"物件名:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z0-9].*?)(?:\n|$)",
-        r"宿泊先:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z0-9].*?)(?:\n|$)",
-        r"リスティング:?\s*([\p{Script=Hiragana}\p{Script=Katakana}\p{Script=Han}A-Za-z0-9].*?)(?:\n|$)",
-    ]
-
-    for pattern in property_name_patterns:
-        match = re.search(pattern, llm_response, re.IGNORECASE)
+    for pattern in _PROPERTY_NAME_PATTERNS:
+        match = pattern.search(llm_response)
         if match:
             result["property_name"] = match.group(1).strip()
             break
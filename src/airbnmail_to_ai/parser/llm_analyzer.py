@@ -1,30 +1,41 @@
 """Compatibility module for the LLM analyzer.
 
 This module re-exports the LLMAnalyzer from the new modular structure
-to maintain backward compatibility.
+to maintain backward compatibility. The analyzer is only imported, and the
+deprecation warning only issued, when the name is actually used.
 """
 
 import warnings
+from typing import TYPE_CHECKING, Any
 
-from airbnmail_to_ai.parser.llm import LLMAnalyzer
-from airbnmail_to_ai.utils.logging import get_logger
+if TYPE_CHECKING:
+    from airbnmail_to_ai.parser.llm import LLMAnalyzer
 
-# Initialize logger
-logger = get_logger(__name__)
+__all__ = ["LLMAnalyzer"]
 
-# Issue a deprecation warning
-warnings.warn(
-    "The module airbnmail_to_ai.parser.llm_analyzer is deprecated. "
-    "Please use airbnmail_to_ai.parser.llm.LLMAnalyzer instead.",
-    DeprecationWarning,
-    stacklevel=2,
-)
 
-# Log deprecation warning as well
-logger.warning(
-    "Using deprecated module airbnmail_to_ai.parser.llm_analyzer. "
-    "Please update your imports to use airbnmail_to_ai.parser.llm.LLMAnalyzer."
-)
+def __getattr__(name: str) -> Any:
+    """Resolve LLMAnalyzer lazily from airbnmail_to_ai.parser.llm.
 
-# Re-export the analyzer
-__all__ = ["LLMAnalyzer"]
+    Args:
+        name: Attribute name.
+
+    Returns:
+        The LLMAnalyzer class.
+
+    Raises:
+        AttributeError: If the name is not LLMAnalyzer.
+    """
+    if name != "LLMAnalyzer":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    warnings.warn(
+        "The module airbnmail_to_ai.parser.llm_analyzer is deprecated. "
+        "Please use airbnmail_to_ai.parser.llm.LLMAnalyzer instead.",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+
+    from airbnmail_to_ai.parser.llm import LLMAnalyzer
+
+    return LLMAnalyzer
@@ -0,0 +1,49 @@
+"""JSON serialization helpers.
+
+Uses orjson when it is installed and falls back to the standard library json
+module otherwise.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:  # pragma: no cover - depends on the platform
+    _HAS_ORJSON = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can catch this
+JSONDecodeError = json.JSONDecodeError
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize an object to a JSON string.
+
+    Args:
+        obj: The object to serialize.
+
+    Returns:
+        JSON string.
+    """
+    if _HAS_ORJSON:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Deserialize a JSON string or bytes.
+
+    Args:
+        data: JSON document to parse.
+
+    Returns:
+        The parsed object.
+
+    Raises:
+        JSONDecodeError: If the data is not valid JSON.
+    """
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
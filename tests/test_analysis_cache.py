@@ -0,0 +1,92 @@
+"""Tests for the LLM analysis cache."""
+
+import pytest
+
+from airbnmail_to_ai.parser.llm.cache import AnalysisCache
+
+
+@pytest.fixture
+def email():
+    """Sample email data."""
+    return {
+        "id": "12345abc",
+        "subject": "Booking request from John",
+        "from": "Airbnb <automated@airbnb.com>",
+        "body_text": "You have a booking request from John.",
+    }
+
+
+def test_key_depends_on_content_only(email):
+    """Test that the key ignores the message ID but not the content."""
+    key = AnalysisCache.key(email)
+
+    assert AnalysisCache.key(dict(email, id="other")) == key
+    assert AnalysisCache.key(dict(email, body_text="Changed")) != key
+
+
+def test_key_depends_on_headers_sent_to_llm(email):
+    """Test that the date and recipient, which are sent to the LLM, change the key."""
+    key = AnalysisCache.key(email)
+
+    assert AnalysisCache.key(dict(email, date="Tue, 15 Apr 2025 09:00:00 +0000")) != key
+    assert AnalysisCache.key(dict(email, to="host@example.com")) != key
+
+
+def test_results_are_copied():
+    """Test that changing a stored or returned result does not change the cache."""
+    cache = AnalysisCache()
+    result = {"notification_type": "booking_request"}
+    cache.set("a", result)
+    result["notification_type"] = "changed"
+
+    cached = cache.get("a")
+    cached["analysis"] = "added"
+
+    assert cache.get("a") == {"notification_type": "booking_request"}
+
+
+def test_key_depends_on_html_body(email):
+    """Test that HTML-only emails with different bodies get different keys."""
+    first = dict(email, body_text="", body_html="<p>Check-in 2025-05-01</p>")
+    second = dict(email, body_text="", body_html="<p>Check-in 2025-06-01</p>")
+
+    assert AnalysisCache.key(first) != AnalysisCache.key(second)
+
+
+def test_key_depends_on_context(email):
+    """Test that the model and prompt version are part of the key."""
+    key = AnalysisCache.key(email, "model-a", "1")
+
+    assert AnalysisCache.key(email, "model-a", "1") == key
+    assert AnalysisCache.key(email, "model-b", "1") != key
+    assert AnalysisCache.key(email, "model-a", "2") != key
+
+
+def test_memory_lru():
+    """Test that the least recently used result is evicted."""
+    cache = AnalysisCache(maxsize=2)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3})
+
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"n": 3}
+
+
+def test_memory_results_expire():
+    """Test that in-memory results are not returned after their time-to-live."""
+    cache = AnalysisCache(ttl=-1)
+    cache.set("a", {"n": 1})
+
+    assert cache.get("a") is None
+
+
+def test_persistent_cache(tmp_path):
+    """Test that results survive across cache instances until they expire."""
+    path = str(tmp_path / "cache.db")
+    AnalysisCache(path=path).set("a", {"notification_type": "booking_request"})
+
+    assert AnalysisCache(path=path).get("a") == {"notification_type": "booking_request"}
+    assert AnalysisCache(path=path, ttl=-1).get("a") is None
@@ -0,0 +1,221 @@
+"""Tests for the database service module."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from airbnmail_to_ai.db.db_service import DatabaseService
+from airbnmail_to_ai.models.notification import AirbnbNotification, NotificationType
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Database service backed by a temporary SQLite file."""
+    service = DatabaseService(db_path=str(tmp_path / "notifications.db"))
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def confirmation():
+    """Sample booking confirmation notification."""
+    return AirbnbNotification(
+        notification_id="67890xyz",
+        notification_type=NotificationType.BOOKING_CONFIRMATION,
+        subject="Booking for Tokyo Apartment is confirmed",
+        received_at=datetime(2025, 4, 16, 10, 20, 30),
+        sender="Airbnb <automated@airbnb.com>",
+        raw_text="The booking for Tokyo Apartment has been confirmed.",
+        raw_html="<html><body>Booking confirmation details</body></html>",
+        property_name="Tokyo Apartment",
+        guest_name="John",
+        check_in="2025-05-01",
+        check_out="2025-05-05",
+        num_guests=2,
+        llm_analysis={"notification_type": "booking_confirmation", "confidence": "high"},
+        llm_confidence="high",
+    )
+
+
+def test_indexes_created(db):
+    """Test that lookup indexes are created with the tables."""
+    db.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    index_names = {row[0] for row in db.cursor.fetchall()}
+
+    assert "idx_notif_dup" in index_names
+    assert "idx_notif_received_id" in index_names
+    assert "idx_notif_received" not in index_names
+
+
+def test_save_and_get_notification(db, confirmation):
+    """Test saving a notification and reading it back."""
+    assert db.save_notification(confirmation)
+
+    notification = db.get_notification("67890xyz")
+    assert notification is not None
+    assert notification.notification_type == NotificationType.BOOKING_CONFIRMATION
+    assert notification.received_at == datetime(2025, 4, 16, 10, 20, 30)
+    assert notification.num_guests == 2
+    assert notification.llm_analysis == {
+        "notification_type": "booking_confirmation",
+        "confidence": "high",
+    }
+
+
+def test_save_notification_updates_existing(db, confirmation):
+    """Test that saving an existing notification updates it in place."""
+    db.save_notification(confirmation)
+
+    updated = confirmation.model_copy(update={"num_guests": 3, "guest_name": None})
+    assert db.save_notification(updated)
+
+    db.cursor.execute("SELECT COUNT(*) FROM airbnb_notifications")
+    assert db.cursor.fetchone()[0] == 1
+
+    notification = db.get_notification("67890xyz")
+    assert notification.num_guests == 3
+    # Fields missing from the update keep their stored value
+    assert notification.guest_name == "John"
+
+
+def test_save_notifications(db, confirmation):
+    """Test saving a batch of notifications in one call."""
+    other = confirmation.model_copy(update={"notification_id": "other"})
+    assert db.save_notifications([confirmation, other])
+    assert db.save_notifications([])
+
+    assert db.get_existing_ids(["67890xyz", "other"]) == {"67890xyz", "other"}
+
+    db.cursor.execute("SELECT COUNT(DISTINCT created_at) FROM airbnb_notifications")
+    assert db.cursor.fetchone()[0] == 1
+
+
+def test_find_duplicate_notifications(db, confirmation):
+    """Test finding notifications with the same booking details."""
+    db.save_notification(confirmation)
+
+    duplicates = db.find_duplicate_notifications(
+        property_name="Tokyo Apartment",
+        check_in="2025-05-01",
+        check_out="2025-05-05",
+        guest_name="John",
+    )
+    assert [d.notification_id for d in duplicates] == ["67890xyz"]
+
+    assert db.find_duplicate_notifications("Other", "2025-05-01", "2025-05-05", "John") == []
+
+
+def test_get_all_notifications(db, confirmation):
+    """Test listing notifications newest first."""
+    older = confirmation.model_copy(
+        update={"notification_id": "older", "received_at": datetime(2025, 4, 1, 9, 0, 0)}
+    )
+    db.save_notification(older)
+    db.save_notification(confirmation)
+
+    notifications = db.get_all_notifications()
+    assert [n.notification_id for n in notifications] == ["67890xyz", "older"]
+    assert isinstance(notifications[0].received_at, datetime)
+    assert notifications[0].notification_type == NotificationType.BOOKING_CONFIRMATION
+    assert notifications[0].to_dict()["check_in"] == "2025-05-01"
+    assert notifications[0].llm_analysis == confirmation.llm_analysis
+    # Message bodies are only loaded on request
+    assert notifications[0].raw_html == ""
+
+    with_body = db.get_all_notifications(include_body=True)
+    assert with_body[0].raw_html == confirmation.raw_html
+
+
+def test_get_all_notifications_before(db, confirmation):
+    """Test keyset pagination on received_at."""
+    for day in range(1, 6):
+        db.save_notification(
+            confirmation.model_copy(
+                update={"notification_id": f"day{day}", "received_at": datetime(2025, 4, day)}
+            )
+        )
+
+    first_page = db.get_all_notifications(limit=2)
+    assert [n.notification_id for n in first_page] == ["day5", "day4"]
+
+    last = first_page[-1]
+    second_page = db.get_all_notifications(
+        limit=2, before=(last.received_at.isoformat(), last.notification_id)
+    )
+    assert [n.notification_id for n in second_page] == ["day3", "day2"]
+
+
+def test_get_all_notifications_before_tied_timestamps(db, confirmation):
+    """Test that pagination does not skip rows sharing a received_at or without one."""
+    for i in range(4):
+        db.save_notification(
+            confirmation.model_copy(
+                update={"notification_id": f"n{i}", "received_at": datetime(2025, 4, 14)}
+            )
+        )
+    db.save_notification(
+        confirmation.model_copy(update={"notification_id": "undated", "received_at": None})
+    )
+
+    seen = []
+    before = None
+    while True:
+        page = db.get_all_notifications(limit=2, before=before)
+        if not page:
+            break
+        seen.extend(n.notification_id for n in page)
+        last = page[-1]
+        before = (
+            last.received_at.isoformat() if last.received_at else None,
+            last.notification_id,
+        )
+
+    assert seen == ["n3", "n2", "n1", "n0", "undated"]
+
+
+def test_get_notifications_by_ids(db, confirmation):
+    """Test fetching several notifications with a single call."""
+    other = confirmation.model_copy(update={"notification_id": "other"})
+    db.save_notification(confirmation)
+    db.save_notification(other)
+
+    notifications = db.get_notifications_by_ids(["other", "missing", "67890xyz"])
+    assert [n.notification_id for n in notifications] == ["other", "67890xyz"]
+    assert db.get_notifications_by_ids([]) == []
+
+
+def test_connections_are_per_thread(db, confirmation):
+    """Test that each thread uses its own connection."""
+    db.save_notification(confirmation)
+    results = {}
+
+    def worker():
+        results["conn"] = db.conn
+        results["notification"] = db.get_notification("67890xyz")
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert results["conn"] is not db.conn
+    assert results["notification"].notification_id == "67890xyz"
+
+
+def test_get_existing_ids(db, confirmation):
+    """Test checking which IDs are already stored."""
+    db.save_notification(confirmation)
+
+    assert db.get_existing_ids(["67890xyz", "missing"]) == {"67890xyz"}
+    assert db.get_existing_ids([]) == set()
+
+
+def test_get_notification_state(db, confirmation):
+    """Test reading the stored and calendar flags together."""
+    assert db.get_notification_state("67890xyz") == (False, False)
+
+    db.save_notification(confirmation)
+    assert db.get_notification_state("67890xyz") == (True, False)
+
+    db.save_calendar_event("67890xyz", "event123")
+    assert db.get_notification_state("67890xyz") == (True, True)
@@ -1,12 +1,33 @@
 """Tests for the email parser module."""
 
-from datetime import datetime
+import json
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 import pytest
 
 from airbnmail_to_ai.models.notification import NotificationType
-from airbnmail_to_ai.parser.email_parser import parse_email, parse_email_date
+from airbnmail_to_ai.parser import email_parser
+from airbnmail_to_ai.parser.email_parser import (
+    extract_num_guests,
+    identify_notification_type_from_subject,
+    parse_email,
+    parse_email_date,
+    parse_emails,
+    parse_emails_parallel,
+    parse_emails_stream,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_analysis_cache(monkeypatch):
+    """Start every test with an empty analysis cache and an analyzer with an API key."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test_key")
+    email_parser._get_analyzer.cache_clear()
+    email_parser.analysis_cache.clear()
+    yield
+    email_parser.analysis_cache.clear()
+    email_parser._get_analyzer.cache_clear()
 
 
 @pytest.fixture
@@ -93,7 +114,7 @@ def test_parse_booking_request(mock_analyze, booking_request_email, mock_llm_req
     notification = parse_email(booking_request_email)
 
     # Check that LLM analyzer was called with correct arguments
-    mock_analyze.assert_called_once_with(booking_request_email)
+    mock_analyze.assert_called_once_with(booking_request_email, use_cache=True)
 
     # Basic assertions
     assert notification is not None
@@ -120,7 +141,7 @@ def test_parse_booking_confirmation(mock_analyze, booking_confirmation_email, mo
     notification = parse_email(booking_confirmation_email)
 
     # Check that LLM analyzer was called with correct arguments
-    mock_analyze.assert_called_once_with(booking_confirmation_email)
+    mock_analyze.assert_called_once_with(booking_confirmation_email, use_cache=True)
 
     # Basic assertions
     assert notification is not None
@@ -163,6 +184,204 @@ def test_parse_unknown_notification(mock_analyze):
     assert notification.check_in is None
 
 
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservations_batch')
+def test_parse_emails_in_batches(
+    mock_analyze_batch,
+    booking_request_email,
+    booking_confirmation_email,
+    mock_llm_request_response,
+    mock_llm_confirmation_response,
+):
+    """Test parsing several emails with batched LLM analysis."""
+    mock_analyze_batch.side_effect = [
+        [mock_llm_request_response, mock_llm_confirmation_response],
+        [mock_llm_request_response],
+    ]
+
+    another_request = dict(booking_request_email, id="another", body_text="Another request")
+    notifications = parse_emails(
+        [booking_request_email, booking_confirmation_email, another_request], batch_size=2
+    )
+
+    assert mock_analyze_batch.call_count == 2
+    assert [n.notification_type for n in notifications] == [
+        NotificationType.BOOKING_REQUEST,
+        NotificationType.BOOKING_CONFIRMATION,
+        NotificationType.BOOKING_REQUEST,
+    ]
+    assert notifications[1].notification_id == "67890xyz"
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservations_batch')
+def test_parse_emails_deduplicates(mock_analyze_batch, booking_request_email, mock_llm_request_response):
+    """Test that identical emails in one call are analyzed once."""
+    mock_analyze_batch.return_value = [mock_llm_request_response]
+    duplicate = dict(booking_request_email, id="duplicate")
+
+    notifications = parse_emails([booking_request_email, duplicate], use_cache=False)
+
+    mock_analyze_batch.assert_called_once_with([booking_request_email], use_cache=False)
+    assert [n.notification_id for n in notifications] == ["12345abc", "duplicate"]
+    assert notifications[1].guest_name == "John"
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservations_batch')
+def test_parse_emails_keeps_emails_with_other_headers_apart(
+    mock_analyze_batch, booking_request_email, mock_llm_request_response
+):
+    """Test that emails differing only in headers sent to the LLM are analyzed separately."""
+    mock_analyze_batch.return_value = [mock_llm_request_response] * 2
+    resent = dict(booking_request_email, id="resent", date="Tue, 15 Apr 2025 09:00:00 +0000")
+
+    notifications = parse_emails([booking_request_email, resent], use_cache=False)
+
+    mock_analyze_batch.assert_called_once_with([booking_request_email, resent], use_cache=False)
+    assert [n.notification_id for n in notifications] == ["12345abc", "resent"]
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservations_batch')
+def test_parse_emails_stream(
+    mock_analyze_batch,
+    booking_request_email,
+    booking_confirmation_email,
+    mock_llm_request_response,
+    mock_llm_confirmation_response,
+):
+    """Test lazily parsing emails one batch at a time."""
+    mock_analyze_batch.side_effect = [
+        [mock_llm_request_response],
+        [mock_llm_confirmation_response],
+    ]
+    html_email = dict(booking_confirmation_email, body_html="<html>Confirmed</html>")
+
+    stream = parse_emails_stream(
+        iter([booking_request_email, html_email]), batch_size=1, include_html=False
+    )
+    first = next(stream)
+    assert mock_analyze_batch.call_count == 1
+    assert first.notification_id == "12345abc"
+
+    second = next(stream)
+    assert second.notification_type == NotificationType.BOOKING_CONFIRMATION
+    assert second.raw_html == ""
+    assert list(stream) == []
+    # The HTML body is dropped from the notification, not from the analyzed email
+    mock_analyze_batch.assert_called_with([html_email], use_cache=True)
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservation')
+def test_parse_emails_parallel(
+    mock_analyze,
+    booking_request_email,
+    booking_confirmation_email,
+    mock_llm_request_response,
+    mock_llm_confirmation_response,
+):
+    """Test parsing several emails with concurrent LLM requests."""
+    responses = {
+        "12345abc": mock_llm_request_response,
+        "67890xyz": mock_llm_confirmation_response,
+    }
+    mock_analyze.side_effect = lambda email, *args: responses[email["id"]]
+
+    notifications = parse_emails_parallel([booking_confirmation_email, booking_request_email])
+
+    assert mock_analyze.call_count == 2
+    assert [n.notification_id for n in notifications] == ["67890xyz", "12345abc"]
+    assert parse_emails_parallel([]) == []
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer._call_llm_api')
+def test_parse_email_uses_cache(mock_analyze, booking_request_email, mock_llm_request_response):
+    """Test that an identical email is only analyzed once."""
+    mock_analyze.return_value = json.dumps(mock_llm_request_response)
+
+    first = parse_email(booking_request_email)
+    second = parse_email(dict(booking_request_email, id="other"))
+    assert mock_analyze.call_count == 1
+    assert first.guest_name == second.guest_name == "John"
+    assert second.notification_id == "other"
+
+    parse_email(booking_request_email, use_cache=False)
+    assert mock_analyze.call_count == 2
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer._call_llm_api')
+def test_parse_emails_no_cache_calls_api(mock_call, booking_request_email, mock_llm_request_response):
+    """Test that use_cache=False (the CLI --no-cache option) ignores cached results."""
+    mock_call.return_value = json.dumps(mock_llm_request_response)
+    key = email_parser._get_analyzer().cache_key(booking_request_email)
+    email_parser.analysis_cache.set(key, {"guest_name": "Stale"})
+
+    notifications = parse_emails([booking_request_email], use_cache=False)
+
+    assert mock_call.call_count == 1
+    assert notifications[0].guest_name == "John"
+    assert email_parser.analysis_cache.get(key) == {"guest_name": "Stale"}
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer._call_llm_api')
+def test_parse_emails_without_api_key_not_cached(mock_call, monkeypatch, booking_request_email):
+    """Test that the placeholder result without an API key is not cached."""
+    monkeypatch.delenv("ANTHROPIC_API_KEY")
+    email_parser._get_analyzer.cache_clear()
+
+    notifications = parse_emails([booking_request_email])
+
+    mock_call.assert_not_called()
+    assert notifications[0].notification_id == "12345abc"
+    key = email_parser._get_analyzer().cache_key(booking_request_email)
+    assert email_parser.analysis_cache.get(key) is None
+
+
+@patch('airbnmail_to_ai.parser.llm.LLMAnalyzer.analyze_reservation')
+def test_parse_email_skips_llm_for_subject_types(mock_analyze):
+    """Test that payout, review and reminder emails are classified without the LLM."""
+    payout_email = {
+        "id": "payout123",
+        "subject": "Your payout was sent",
+        "from": "Airbnb <automated@airbnb.com>",
+        "body_text": "We sent a payout of ¥25,000.",
+    }
+
+    notification = parse_email(payout_email)
+    mock_analyze.assert_not_called()
+    assert notification.notification_type == NotificationType.PAYMENT
+    assert notification.sender == "Airbnb <automated@airbnb.com>"
+    assert notification.llm_analysis == {}
+    assert notification.check_in is None
+
+    mock_analyze.return_value = {"notification_type": "payment", "confidence": "high"}
+    notification = parse_email(payout_email, skip_llm_for=frozenset())
+    mock_analyze.assert_called_once()
+    assert notification.llm_confidence == "high"
+
+
+@pytest.mark.parametrize(
+    "subject, expected",
+    [
+        ("Reservation request from John", NotificationType.BOOKING_REQUEST),
+        ("予約確定: Hideaway Chalet", NotificationType.BOOKING_CONFIRMATION),
+        # Full-width characters are folded to ASCII
+        ("Ｂｏｏｋｉｎｇ ＣＯＮＦＩＲＭＥＤ", NotificationType.BOOKING_CONFIRMATION),
+        # Earlier types in the keyword table take priority
+        ("New message about your cancelled reservation", NotificationType.CANCELLATION),
+        ("Your payout was sent", NotificationType.PAYMENT),
+        ("Something totally unrelated", NotificationType.UNKNOWN),
+    ],
+)
+def test_identify_notification_type_from_subject(subject, expected):
+    """Test keyword-based notification type detection."""
+    assert identify_notification_type_from_subject(subject) == expected
+
+
+def test_extract_num_guests():
+    """Test reading the number of guests from LLM results or the email body."""
+    assert extract_num_guests({"num_guests": "3"}, "") == 3
+    assert extract_num_guests({"num_guests": None}, "Reservation for\n4 Guests, 2 nights") == 4
+    assert extract_num_guests({}, "No guest count here") is None
+
+
 def test_date_parsing():
     """Test date parsing from email headers."""
     # Test standard format
@@ -173,6 +392,22 @@ def test_date_parsing():
     assert parsed_date.month == 4
     assert parsed_date.day == 15
 
+    # Test header with a zone comment
+    parsed_date = parse_email_date("Mon, 14 Apr 2025 14:56:34 +0000 (UTC)")
+    assert parsed_date == datetime(2025, 4, 14, 14, 56, 34, tzinfo=timezone.utc)
+
+    # Test ISO formats
+    assert parse_email_date("2025-04-14T14:56:34+0000") == datetime(
+        2025, 4, 14, 14, 56, 34, tzinfo=timezone.utc
+    )
+    assert parse_email_date("2025-04-14") == datetime(2025, 4, 14)
+
+    # Test date embedded in other text
+    assert parse_email_date("Sent on Mon, 14 Apr 2025") == datetime(2025, 4, 14)
+    assert parse_email_date("Monday, 14 April 2025 at noon") == datetime(2025, 4, 14)
+    # An invalid ISO date falls through to the next date in the text
+    assert parse_email_date("Moved from 2025-13-45 to 3 Mar 2025") == datetime(2025, 3, 3)
+
     # Test invalid format
     invalid_date = "Not a real date"
     assert parse_email_date(invalid_date) is None
@@ -0,0 +1,183 @@
+"""Tests for the Gmail service module."""
+
+import base64
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from airbnmail_to_ai.gmail.gmail_service import GmailService
+
+
+def encode(text):
+    """Encode a message body the way the Gmail API does."""
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def make_message(msg_id):
+    """Build a Gmail API message resource with a plain text body."""
+    return {
+        "id": msg_id,
+        "threadId": f"thread-{msg_id}",
+        "labelIds": ["UNREAD"],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [{"name": "Subject", "value": f"Subject {msg_id}"}],
+            "body": {"data": encode(f"Body {msg_id}")},
+        },
+    }
+
+
+class FakeBatch:
+    """Batch request that answers every added request with a message resource."""
+
+    def __init__(self, callback):
+        """Initialize the batch with the callback that receives each response."""
+        self.callback = callback
+        self.request_ids = []
+
+    def add(self, request, request_id):
+        """Record the ID of an added request."""
+        self.request_ids.append(request_id)
+
+    def execute(self):
+        """Answer every recorded request."""
+        for request_id in self.request_ids:
+            self.callback(request_id, make_message(request_id), None)
+
+
+@pytest.fixture
+def gmail():
+    """Gmail service with a mocked API client."""
+    service = GmailService()
+    api = MagicMock()
+    batches = []
+
+    def new_batch(callback):
+        batches.append(FakeBatch(callback))
+        return batches[-1]
+
+    api.new_batch_http_request.side_effect = new_batch
+    service.__dict__["service"] = api
+    service.batches = batches
+    return service
+
+
+def list_ids(gmail, msg_ids):
+    """Make the messages list call return the given IDs."""
+    gmail.service.users().messages().list().execute.return_value = {
+        "messages": [{"id": msg_id} for msg_id in msg_ids]
+    }
+
+
+def test_get_messages_batches_requests(gmail):
+    """Test that message details are fetched in batches of at most BATCH_SIZE."""
+    gmail.BATCH_SIZE = 2
+    list_ids(gmail, ["a", "b", "c", "d", "e"])
+
+    messages = gmail.get_messages()
+
+    assert [batch.request_ids for batch in gmail.batches] == [
+        ["a", "b"],
+        ["c", "d"],
+        ["e"],
+    ]
+    assert [m["id"] for m in messages] == ["a", "b", "c", "d", "e"]
+    assert messages[0]["subject"] == "Subject a"
+    assert messages[0]["body_text"] == "Body a"
+    # Only the fields that are parsed are requested
+    _, kwargs = gmail.service.users().messages().get.call_args
+    assert kwargs["fields"] == GmailService.MESSAGE_FIELDS
+
+
+def test_parse_nested_parts(gmail):
+    """Test that bodies inside nested multipart parts are found."""
+
+    def part(mime_type, text):
+        return {"mimeType": mime_type, "body": {"data": encode(text)}}
+
+    message = make_message("a")
+    message["payload"] = {
+        "mimeType": "multipart/mixed",
+        "headers": [],
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    part("text/plain", "Plain body"),
+                    part("text/html", "<p>HTML body</p>"),
+                ],
+            },
+            part("text/plain", "Attached notes"),
+        ],
+    }
+
+    result = gmail._parse_message("a", message, want_html=True)
+
+    assert result["body_text"] == "Plain body"
+    assert result["body_html"] == "<p>HTML body</p>"
+
+
+def test_get_messages_uses_cache(gmail):
+    """Test that cached message details are not fetched again."""
+    list_ids(gmail, ["a", "b"])
+    gmail.get_messages()
+
+    list_ids(gmail, ["a", "b", "c"])
+    messages = gmail.get_messages()
+
+    assert [batch.request_ids for batch in gmail.batches] == [["a", "b"], ["c"]]
+    assert [m["id"] for m in messages] == ["a", "b", "c"]
+
+    # A request for the HTML body is cached separately
+    gmail.get_messages(want_html=True)
+    assert gmail.batches[-1].request_ids == ["a", "b", "c"]
+
+
+def test_cached_messages_are_copied(gmail):
+    """Test that changing returned message details does not change the cache."""
+    list_ids(gmail, ["a"])
+    gmail.get_messages()[0]["body_text"] = "changed"
+
+    assert gmail.get_messages()[0]["body_text"] == "Body a"
+    assert len(gmail.batches) == 1
+
+
+def test_get_messages_skips_known_ids(gmail):
+    """Test that messages already in the database are not fetched."""
+    list_ids(gmail, ["a", "b", "c"])
+    db = MagicMock()
+    db.get_existing_ids.return_value = {"b"}
+
+    messages = gmail.get_messages(db=db)
+
+    db.get_existing_ids.assert_called_once_with(["a", "b", "c"])
+    assert [batch.request_ids for batch in gmail.batches] == [["a", "c"]]
+    assert [m["id"] for m in messages] == ["a", "c"]
+
+
+@patch("airbnmail_to_ai.gmail.gmail_service.build")
+@patch("airbnmail_to_ai.gmail.gmail_service.Credentials.from_authorized_user_file")
+def test_token_loaded_as_json(mock_from_file, mock_build, tmp_path):
+    """Test that a JSON token file is loaded without re-authorizing."""
+    token_path = tmp_path / "token.json"
+    token_path.write_text("{}")
+    creds = MagicMock(valid=True)
+    mock_from_file.return_value = creds
+
+    service = GmailService(token_path=str(token_path)).service
+
+    mock_from_file.assert_called_once_with(str(token_path), GmailService.SCOPES)
+    assert mock_build.call_args.kwargs["credentials"] is creds
+    assert service is mock_build.return_value
+
+
+def test_unreadable_token_is_ignored(tmp_path):
+    """Test that an unreadable token falls back to authorizing again."""
+    token_path = tmp_path / "token.json"
+    token_path.write_bytes(b"\x80\x04not json")
+    gmail = GmailService(
+        credentials_path=str(tmp_path / "missing.json"), token_path=str(token_path)
+    )
+
+    with pytest.raises(FileNotFoundError):
+        assert gmail.service is not None
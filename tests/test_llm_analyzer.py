@@ -1,13 +1,36 @@
 """Tests for the LLM analyzer module."""
 
+import json
+import re
 import unittest
 from unittest.mock import patch, MagicMock
 
-from airbnmail_to_ai.parser.llm import LLMAnalyzer
+from airbnmail_to_ai.parser.llm import AnalysisCache, LLMAnalyzer
 from airbnmail_to_ai.parser.llm.date_utils import normalize_date
 from airbnmail_to_ai.parser.llm.response_parser import parse_llm_response
 
 
+def make_stream_response(text):
+    """Build a mock streaming API response that delivers text in two deltas."""
+    middle = len(text) // 2
+    events = [{"type": "message_start", "message": {"role": "assistant"}}]
+    for chunk in (text[:middle], text[middle:]):
+        events.append(
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+        )
+    events.append({"type": "message_stop"})
+
+    lines = []
+    for event in events:
+        lines.append(f"event: {event['type']}".encode())
+        lines.append(f"data: {json.dumps(event)}".encode())
+        lines.append(b"")
+
+    mock_response = MagicMock()
+    mock_response.iter_lines.return_value = lines
+    return mock_response
+
+
 class TestLLMAnalyzer(unittest.TestCase):
     """Test the LLM analyzer functionality."""
 
@@ -36,15 +59,11 @@ class TestLLMAnalyzer(unittest.TestCase):
             """
         }
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_analyze_reservation_with_api(self, mock_post):
         """Test analyzing reservation with API call."""
-        # Mock the API response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "content": [
-                {
-                    "text": """
+        # Mock the streamed API response
+        mock_post.return_value = make_stream_response("""
                     ```json
                     {
                       "notification_type": "booking_confirmation",
@@ -57,12 +76,7 @@ class TestLLMAnalyzer(unittest.TestCase):
                       "confidence": "high"
                     }
                     ```
-                    """
-                }
-            ]
-        }
-        mock_response.raise_for_status = MagicMock()
-        mock_post.return_value = mock_response
+                    """)
 
         # Call the analyze_reservation method
         result = self.analyzer.analyze_reservation(self.sample_email)
@@ -70,9 +84,13 @@ class TestLLMAnalyzer(unittest.TestCase):
         # Check that the API was called with correct parameters
         mock_post.assert_called_once()
         args, kwargs = mock_post.call_args
-        self.assertEqual(kwargs['headers']['x-api-key'], 'test_key')
-        self.assertEqual(kwargs['headers']['anthropic-version'], '2023-06-01')
+        self.assertEqual(self.analyzer._session.headers['x-api-key'], 'test_key')
+        self.assertEqual(self.analyzer._session.headers['anthropic-version'], '2023-06-01')
         self.assertIn('messages', kwargs['json'])
+        self.assertTrue(kwargs['json']['stream'])
+        self.assertEqual(
+            kwargs['json']['tool_choice'], {"type": "tool", "name": "record_reservation"}
+        )
 
         # Verify the results
         self.assertEqual(result['check_in_date'], '2025-06-15')
@@ -81,9 +99,41 @@ class TestLLMAnalyzer(unittest.TestCase):
         self.assertEqual(result['num_guests'], 2)
         self.assertEqual(result['property_name'], 'Hideaway Chalet')
         self.assertEqual(result['confidence'], 'high')
-        self.assertIsNotNone(result['analysis'])
+        self.assertNotIn('analysis', result)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_analyze_reservation_tool_use(self, mock_post):
+        """Test that the streamed input of the reservation tool call is parsed."""
+        tool_input = json.dumps({
+            "notification_type": "booking_confirmation",
+            "check_in_date": "2025-06-15",
+            "check_out_date": "2025-06-20",
+            "num_guests": 2,
+            "confidence": "high",
+        })
+        events = [
+            {"type": "content_block_start", "index": 0,
+             "content_block": {"type": "tool_use", "name": "record_reservation", "input": {}}},
+            {"type": "content_block_delta", "index": 0,
+             "delta": {"type": "input_json_delta", "partial_json": tool_input[:20]}},
+            {"type": "content_block_delta", "index": 0,
+             "delta": {"type": "input_json_delta", "partial_json": tool_input[20:]}},
+            {"type": "message_stop"},
+        ]
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [
+            f"data: {json.dumps(event)}".encode() for event in events
+        ]
+        mock_post.return_value = mock_response
+
+        result = self.analyzer.analyze_reservation(self.sample_email)
+
+        self.assertEqual(result['notification_type'], 'booking_confirmation')
+        self.assertEqual(result['check_in_date'], '2025-06-15')
+        self.assertEqual(result['num_guests'], 2)
+        self.assertNotIn('analysis', result)
+
+    @patch('requests.Session.post')
     @patch('os.environ.get')
     def test_analyze_reservation_no_api_key(self, mock_env_get, mock_post):
         """Test analyzing reservation without API key (mock mode)."""
@@ -106,12 +156,188 @@ class TestLLMAnalyzer(unittest.TestCase):
         self.assertEqual(result.get('notification_type', ''), 'unknown')
         self.assertIsNotNone(result.get('analysis'))
 
+        # The API call itself refuses to run without a key
+        with self.assertRaises(RuntimeError):
+            analyzer._call_llm_api([{"role": "user", "content": "test"}])
+
+    @patch('requests.Session.post')
+    def test_analyze_reservations_batch(self, mock_post):
+        """Test analyzing several emails with a single API call."""
+        mock_post.return_value = make_stream_response("""
+                    ```json
+                    [
+                      {"notification_type": "booking_confirmation", "check_in_date": "2025-06-15",
+                       "check_out_date": "2025-06-20", "confidence": "high"},
+                      {"notification_type": "message", "check_in_date": null,
+                       "check_out_date": null, "confidence": "medium"}
+                    ]
+                    ```
+                    """)
+
+        results = self.analyzer.analyze_reservations_batch([self.sample_email, self.sample_email])
+
+        mock_post.assert_called_once()
+        args, kwargs = mock_post.call_args
+        self.assertIn('Email 2:', kwargs['json']['messages'][0]['content'])
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['check_in_date'], '2025-06-15')
+        self.assertEqual(results[1]['notification_type'], 'message')
+        self.assertNotIn('analysis', results[1])
+
+    @patch('requests.Session.post')
+    def test_analyze_reservations_batch_max_chars(self, mock_post):
+        """Test that batches are grouped by length within the character limit."""
+        def respond(*args, **kwargs):
+            content = kwargs['json']['messages'][0]['content']
+            count = len(re.findall(r'^Email \d+:', content, re.MULTILINE))
+            result = {"notification_type": "message"}
+            return make_stream_response(json.dumps([result] * count if count else result))
+
+        mock_post.side_effect = respond
+        short_email = dict(self.sample_email, body_text="短い本文")
+        long_length = len(self.analyzer._prepare_email_summary(self.sample_email))
+        short_length = len(self.analyzer._prepare_email_summary(short_email))
+
+        results = self.analyzer.analyze_reservations_batch(
+            [self.sample_email, short_email, short_email, self.sample_email],
+            max_batch_chars=long_length + short_length * 2,
+        )
+
+        # The short emails fill the first request up with one long email
+        self.assertEqual(mock_post.call_count, 2)
+        first_request = mock_post.call_args_list[0].kwargs['json']['messages'][0]['content']
+        self.assertIn('these 3 Airbnb emails', first_request)
+        self.assertEqual(first_request.count('短い本文'), 2)
+        self.assertEqual(len(results), 4)
+        self.assertEqual([r['notification_type'] for r in results], ['message'] * 4)
+
+    @patch('requests.Session.post')
+    def test_analyze_reservation_cache(self, mock_post):
+        """Test that an identical email is answered from the cache."""
+        mock_post.side_effect = lambda *args, **kwargs: make_stream_response(
+            '{"notification_type": "booking_confirmation", "confidence": "high"}'
+        )
+        analyzer = LLMAnalyzer(api_key="test_key", cache=AnalysisCache())
+
+        first = analyzer.analyze_reservation(self.sample_email)
+        second = analyzer.analyze_reservation(dict(self.sample_email))
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(first, second)
+
+        analyzer.analyze_reservation(self.sample_email, use_cache=False)
+        analyzer.analyze_reservation(self.sample_email, system_prompt="Custom prompt")
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch('requests.Session.post')
+    def test_analyze_reservations_concurrently(self, mock_post):
+        """Test analyzing several emails with one API call each."""
+        mock_post.side_effect = lambda *args, **kwargs: make_stream_response(
+            '{"notification_type": "booking_confirmation", "confidence": "high"}'
+        )
+
+        results = self.analyzer.analyze_reservations_concurrently(
+            [self.sample_email] * 3, max_workers=2
+        )
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(
+            [r['notification_type'] for r in results], ['booking_confirmation'] * 3
+        )
+
+    @patch('requests.Session.post')
+    def test_analyze_reservations_batch_splits_on_bad_response(self, mock_post):
+        """Test that a batch is split when the response has the wrong shape."""
+        single_text = '{"notification_type": "booking_confirmation", "confidence": "high"}'
+        mock_post.side_effect = [
+            make_stream_response("[]"),
+            make_stream_response(single_text),
+            make_stream_response(single_text),
+        ]
+
+        results = self.analyzer.analyze_reservations_batch([self.sample_email, self.sample_email])
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual([r['notification_type'] for r in results], ['booking_confirmation'] * 2)
+
+    @patch('requests.Session.post')
+    def test_analyze_reservations_batch_split_without_cache(self, mock_post):
+        """Test that split batches do not read the cache when use_cache is False."""
+        single_text = '{"notification_type": "booking_confirmation", "confidence": "high"}'
+        mock_post.side_effect = [
+            make_stream_response("[]"),
+            make_stream_response(single_text),
+            make_stream_response(single_text),
+        ]
+        analyzer = LLMAnalyzer(api_key="test_key", cache=AnalysisCache())
+        analyzer.cache.set(analyzer.cache_key(self.sample_email), {"notification_type": "stale"})
+
+        results = analyzer.analyze_reservations_batch(
+            [self.sample_email, self.sample_email], use_cache=False
+        )
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual([r['notification_type'] for r in results], ['booking_confirmation'] * 2)
+
+    @patch('requests.Session.post')
+    def test_analyze_reservation_stream_error(self, mock_post):
+        """Test that an error event in the stream is reported as a failed analysis."""
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [
+            b"event: error",
+            b'data: {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}',
+        ]
+        mock_post.return_value = mock_response
+
+        result = self.analyzer.analyze_reservation(self.sample_email)
+
+        self.assertIn('overloaded_error', result['error'])
+        self.assertEqual(result['confidence'], 'low')
+
+    @patch('airbnmail_to_ai.parser.llm.analyzer.time.monotonic')
+    @patch('requests.Session.post')
+    def test_analyze_reservation_stream_idle(self, mock_post, mock_monotonic):
+        """Test that a stream of only pings is aborted once it has been idle too long."""
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [b'data: {"type": "ping"}'] * 3
+        mock_post.return_value = mock_response
+        mock_monotonic.side_effect = [0.0, 10.0, 20.0, 31.0]
+
+        result = self.analyzer.analyze_reservation(self.sample_email)
+
+        self.assertIn('idle', result['error'])
+        mock_response.close.assert_called_once()
+
+    def test_context_manager_closes_session(self):
+        """Test that leaving the context closes the HTTP session."""
+        with patch('requests.Session.close') as mock_close:
+            with LLMAnalyzer(api_key="test_key"):
+                mock_close.assert_not_called()
+        mock_close.assert_called_once()
+
+    def test_prepare_email_summary_html_only(self):
+        """Test that the HTML body is reduced to text when there is no plain text body."""
+        email = dict(
+            self.sample_email,
+            body_text="",
+            body_html=(
+                "<html><head><style>p { color: red; }</style></head>"
+                "<body><p>Check-in:&nbsp;June 15</p>\n<p>Tom &amp; Jerry</p></body></html>"
+            ),
+        )
+
+        summary = self.analyzer._prepare_email_summary(email)
+
+        self.assertTrue(summary.endswith("Email Body:\nCheck-in: June 15 Tom & Jerry"))
+        self.assertNotIn("color", summary)
+
     def test_normalize_date(self):
         """Test date normalization function."""
         test_cases = [
             ("2025-06-15", "2025-06-15"),  # Already in correct format
             ("15/06/2025", "2025-06-15"),  # DD/MM/YYYY
             ("06/15/2025", "2025-06-15"),  # MM/DD/YYYY
+            ("5/6/2025", "2025-06-05"),  # D/M/YYYY, day first when ambiguous
+            ("29/02/2023", "29/02/2023"),  # Not a valid date
             ("15 June 2025", "2025-06-15"),  # DD Month YYYY
             ("June 15, 2025", "2025-06-15"),  # Month DD, YYYY
             ("15 Jun 2025", "2025-06-15"),  # DD MMM YYYY
@@ -146,6 +372,12 @@ class TestLLMAnalyzer(unittest.TestCase):
         self.assertEqual(result1['notification_type'], 'booking_confirmation')
         self.assertEqual(result1['confidence'], 'high')
 
+        # Test with JSON embedded in surrounding text
+        response7 = 'Here is the result: {"notification_type": "message", "note": "a } b"} Done.'
+        result7 = parse_llm_response(response7)
+        self.assertEqual(result7['notification_type'], 'message')
+        self.assertEqual(result7['note'], 'a } b')
+
         # Test with clear check-in/check-out indicators but no JSON
         response2 = "Check-in date: 2025-06-15\nCheck-out date: 2025-06-20"
         result2 = parse_llm_response(response2)
@@ -167,6 +399,30 @@ class TestLLMAnalyzer(unittest.TestCase):
         self.assertIsNone(result4['check_out_date'])
         self.assertEqual(result4['confidence'], 'low')
 
+        # Test Japanese guest and property names without JSON
+        response6 = "ゲスト名: 山田　太郎\n物件名: 東京アパートメント\nゲスト人数 大人2人"
+        result6 = parse_llm_response(response6)
+        self.assertEqual(result6['guest_name'], '山田　太郎')
+        self.assertEqual(result6['property_name'], '東京アパートメント')
+        self.assertEqual(result6['num_guests'], 2)
+
+        # Test notification type keywords; earlier types take priority
+        response5 = "A new MESSAGE about the cancelled reservation"
+        self.assertEqual(parse_llm_response(response5)['notification_type'], 'cancellation')
+
+        # Arrays and scalars are not results; prose falls back to the regex parser
+        result8 = parse_llm_response('The dates are ["2025-05-01", "2025-05-05"]')
+        self.assertEqual(result8['check_in_date'], '2025-05-01')
+        self.assertEqual(result8['check_out_date'], '2025-05-05')
+        self.assertEqual(parse_llm_response('42')['notification_type'], 'unknown')
+        result9 = parse_llm_response('Seen [1] then {"notification_type": "message"}')
+        self.assertEqual(result9['notification_type'], 'message')
+
+        # The raw response is only kept when asked for
+        self.assertEqual(result1['analysis'], response1)
+        self.assertNotIn('analysis', parse_llm_response(response1, keep_analysis=False))
+        self.assertNotIn('analysis', parse_llm_response(response5, keep_analysis=False))
+
 
 if __name__ == '__main__':
     unittest.main()